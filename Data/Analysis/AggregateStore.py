@@ -0,0 +1,161 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+# Файл с накопленными агрегатами
+STORE_PATH = 'salary_aggregates.pkl'
+
+# Разрезы и показатели, как в отчёте Analis.py
+STORE_KEYS = ['profession', 'resume_region', 'education_level']
+STORE_VALUES = ['expected_salary', 'average_compensation']
+
+# Относительная точность квантильного скетча (1%)
+SKETCH_ACCURACY = 0.01
+_GAMMA = (1 + SKETCH_ACCURACY) / (1 - SKETCH_ACCURACY)
+_LOG_GAMMA = np.log(_GAMMA)
+# Номер корзины для нулевых значений
+_ZERO_BUCKET = np.iinfo(np.int32).min
+
+
+def _buckets(values):
+    """Номера логарифмических корзин скетча для неотрицательных значений"""
+    buckets = np.full(len(values), _ZERO_BUCKET, dtype=np.int32)
+    positive = values > 0
+    buckets[positive] = np.ceil(np.log(values[positive]) / _LOG_GAMMA)
+    return buckets
+
+
+def _bucket_values(buckets):
+    """Представитель корзины: значение с относительной ошибкой не больше SKETCH_ACCURACY"""
+    buckets = np.asarray(buckets)
+    values = 2 * np.power(_GAMMA, buckets.astype(np.float64)) / (_GAMMA + 1)
+    return np.where(buckets == _ZERO_BUCKET, 0.0, values)
+
+
+def _merge_counts(old, new):
+    """Сложение накопленных и новых счётчиков с выравниванием по группам"""
+    if len(old) == 0:
+        return new
+    return new.add(old, fill_value=0)
+
+
+def add_average_compensation(df):
+    """Средняя вилка зарплат, как в Analis.py"""
+    df['average_compensation'] = (df['compensation_from'] + df['compensation_to']) / 2
+    return df
+
+
+class AggregateStore:
+    """Накопленные суммы, количества и квантильные скетчи зарплат по разрезам
+
+    Скетчи - логарифмические гистограммы (как DDSketch): они складываются
+    простым сложением счётчиков, поэтому новая порция данных обновляет
+    хранилище за время, зависящее только от её размера. Удаление
+    дубликатов между порциями хранилище не выполняет.
+    """
+
+    def __init__(self, keys=STORE_KEYS, values=STORE_VALUES):
+        self.keys = list(keys)
+        self.values = list(values)
+        self.rows = 0
+        # {ключ: DataFrame с суммами и количествами по группам}
+        self.totals = {key: pd.DataFrame() for key in self.keys}
+        # {(ключ, показатель): Series счётчиков с индексом (группа, корзина)}
+        self.sketches = {(key, value): pd.Series(dtype='int64')
+                         for key in self.keys for value in self.values}
+
+    @classmethod
+    def load(cls, path=STORE_PATH):
+        """Загрузка хранилища (пустое, если файла ещё нет)"""
+        if not os.path.exists(path):
+            return cls()
+        state = pd.read_pickle(path)
+        store = cls(state['keys'], state['values'])
+        store.rows = state['rows']
+        # Суммы хранятся в float64 (состояние старых версий могло быть во float32)
+        store.totals = {key: totals.astype('float64') for key, totals in state['totals'].items()}
+        store.sketches = state['sketches']
+        return store
+
+    def save(self, path=STORE_PATH):
+        # Сохраняется только состояние, чтобы файл не зависел от модуля класса
+        pd.to_pickle({'keys': self.keys, 'values': self.values, 'rows': self.rows,
+                      'totals': self.totals, 'sketches': self.sketches}, path)
+
+    def update(self, delta):
+        """Добавление порции новых очищенных записей"""
+        # Категориальные ключи приводятся к обычным значениям, чтобы индексы
+        # групп из разных порций совпадали; показатели суммируются во float64
+        # (float32 из Schema накапливал бы ошибку с каждой порцией)
+        delta = delta.astype({**{key: 'object' for key in self.keys},
+                              **{value: 'float64' for value in self.values}})
+        for key in self.keys:
+            grouped = delta.groupby(key, observed=True)[self.values]
+            batch = pd.concat({'sum': grouped.sum(), 'count': grouped.count()}, axis=1).astype('float64')
+            self.totals[key] = _merge_counts(self.totals[key], batch)
+
+            for value in self.values:
+                column = delta[value].to_numpy(dtype=np.float64)
+                valid = ~np.isnan(column)
+                counts = pd.Series(1, index=pd.MultiIndex.from_arrays(
+                    [delta[key].to_numpy()[valid], _buckets(column[valid])],
+                    names=[key, 'bucket'])).groupby(level=[0, 1]).sum()
+                self.sketches[(key, value)] = _merge_counts(self.sketches[(key, value)], counts)
+        self.rows += len(delta)
+
+    def mean(self, key, value):
+        """Среднее значение показателя по группам"""
+        totals = self.totals[key]
+        return (totals[('sum', value)] / totals[('count', value)]).rename(value)
+
+    def count(self, key, value):
+        return self.totals[key][('count', value)].astype('int64').rename(value)
+
+    def quantile(self, key, value, q=0.5):
+        """Приближённый квантиль показателя по группам (по скетчу)"""
+        result = {}
+        for group, counts in self.sketches[(key, value)].groupby(level=0):
+            counts = counts.droplevel(0).sort_index()
+            cumulative = counts.to_numpy().cumsum()
+            position = np.searchsorted(cumulative, q * (cumulative[-1] - 1) + 1)
+            result[group] = _bucket_values(counts.index[position])
+        return pd.Series(result, name=value).rename_axis(key)
+
+
+def print_report(store):
+    """Те же таблицы средних, что печатает Analis.py"""
+    tables = [
+        ('Группировка данных по профессиям и расчет средней ожидаемой зарплаты',
+         'profession', 'expected_salary'),
+        ('Группировка данных по регионам и расчет средней зарплаты',
+         'resume_region', 'expected_salary'),
+        ('Группировка данных по уровню образования и расчет средней зарплаты',
+         'education_level', 'expected_salary'),
+        ('Группировка по профессиям и расчет средней вилки зарплат',
+         'profession', 'average_compensation'),
+    ]
+    for title, key, value in tables:
+        print(f'{title}: {store.mean(key, value).sort_values(ascending=False)}')
+        print('_____________________________________________________________________')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Инкрементальные агрегаты зарплат hh.ru')
+    parser.add_argument('delta', nargs='?',
+                        help='CSV или Parquet с новыми очищенными записями (CleanData.py)')
+    parser.add_argument('--store', default=STORE_PATH)
+    args = parser.parse_args()
+
+    store = AggregateStore.load(args.store)
+    if args.delta:
+        columns = store.keys + ['expected_salary', 'compensation_from', 'compensation_to']
+        if args.delta.endswith('.parquet'):
+            delta = pd.read_parquet(args.delta, columns=columns)
+        else:
+            delta = pd.read_csv(args.delta, usecols=columns)
+        store.update(add_average_compensation(delta))
+        store.save(args.store)
+        print(f'Добавлено записей: {len(delta)}, всего в хранилище: {store.rows}')
+    print_report(store)
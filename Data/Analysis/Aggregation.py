@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+
+# Квантили, которые считаются по умолчанию
+DEFAULT_QUANTILES = (0.25, 0.5, 0.75)
+
+
+def _group_codes(column):
+    """Целочисленные коды групп (-1 для пропусков) и подписи групп"""
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return column.cat.codes.to_numpy(), column.cat.categories
+    codes, uniques = pd.factorize(column, sort=True)
+    return codes, uniques
+
+
+def _quantile_name(q):
+    return 'median' if q == 0.5 else f'q{round(q * 100):02d}'
+
+
+def _sorted_quantiles(grouped, starts, counts, q):
+    """Квантили групп по отсортированным внутри групп значениям (линейная интерполяция)"""
+    result = np.full(len(counts), np.nan)
+    has_rows = counts > 0
+    pos = starts[has_rows] + q * (counts[has_rows] - 1)
+    lo = np.floor(pos).astype(np.int64)
+    hi = np.ceil(pos).astype(np.int64)
+    result[has_rows] = grouped[lo] + (grouped[hi] - grouped[lo]) * (pos - lo)
+    return result
+
+
+def aggregate(df, keys, values, quantiles=DEFAULT_QUANTILES):
+    """Групповые статистики по нескольким ключам за один проход по данным
+
+    Возвращает словарь {ключ: DataFrame}, где столбцы - пары (значение, статистика):
+    count, mean, median и квантили.
+    """
+    codes = {key: _group_codes(df[key]) for key in keys}
+    stats = {key: {} for key in keys}
+
+    for value in values:
+        v = df[value].to_numpy(dtype=np.float64)
+        valid = ~np.isnan(v)
+        v = v[valid]
+
+        # Значения сортируются один раз и переиспользуются для всех ключей
+        order = np.argsort(v, kind='stable')
+        sorted_v = v[order]
+
+        for key in keys:
+            key_codes, labels = codes[key]
+            c = key_codes[valid]
+            known = c >= 0
+            n_groups = len(labels)
+
+            counts = np.bincount(c[known], minlength=n_groups)
+            sums = np.bincount(c[known], weights=v[known], minlength=n_groups)
+
+            # Устойчивая сортировка кодов сохраняет порядок значений внутри групп
+            c_sorted = c[order]
+            known_sorted = c_sorted >= 0
+            grouped = sorted_v[known_sorted][np.argsort(c_sorted[known_sorted], kind='stable')]
+            starts = np.cumsum(counts) - counts
+
+            with np.errstate(invalid='ignore', divide='ignore'):
+                stats[key][(value, 'count')] = counts
+                stats[key][(value, 'mean')] = sums / counts
+            for q in quantiles:
+                stats[key][(value, _quantile_name(q))] = _sorted_quantiles(grouped, starts, counts, q)
+
+    result = {}
+    for key in keys:
+        labels = codes[key][1]
+        frame = pd.DataFrame(stats[key], index=pd.Index(labels, name=key))
+        frame.columns = pd.MultiIndex.from_tuples(frame.columns, names=['value', 'stat'])
+        # Как и groupby, не показываем группы без строк
+        result[key] = frame[frame.xs('count', axis=1, level='stat').sum(axis=1) > 0]
+    return result
@@ -1,76 +1,102 @@
-import pandas as pd
+import argparse
+import os
+import sys
+
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'common'))
+from DatasetIO import load_cleaned
+from Schema import memory_report
+from Aggregation import aggregate
+from BatchRender import ScreenRenderer, render_batch
+
+# Для отчёта нужны только эти столбцы: широкие текстовые поля не читаются
+report_columns = ['profession', 'resume_region', 'education_level',
+                  'expected_salary', 'compensation_from', 'compensation_to']
+
+
+def plot_top20(series, title, xlabel, ylabel, color, renderer):
+    """Столбчатая диаграмма топ-20 групп"""
+    plt.figure(figsize=(12, 8))
+    series.head(20).plot(kind='bar', color=color)
+    plt.title(title, fontsize=16)
+    plt.xlabel(xlabel, fontsize=14)
+    plt.ylabel(ylabel, fontsize=14)
+    plt.xticks(rotation=45, ha='right')
+    plt.grid(axis='y', linestyle='--', alpha=0.7)
+    plt.tight_layout()
+    renderer.show()
+
+
+def plot_education(series, renderer):
+    """Средняя зарплата по уровню образования"""
+    plt.figure(figsize=(10, 6))
+    sns.barplot(x=series.index, y=series.values, palette='viridis')
+    plt.title('Средняя ожидаемая зарплата по уровню образования', fontsize=16)
+    plt.xlabel('Уровень образования', fontsize=14)
+    plt.ylabel('Средняя зарплата', fontsize=14)
+    plt.xticks(rotation=45, ha='right')
+    plt.grid(axis='y', linestyle='--', alpha=0.7)
+    plt.tight_layout()
+    renderer.show()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Анализ зарплат hh.ru')
+    parser.add_argument('--batch', metavar='DIR',
+                        help='сохранить все графики в каталог без показа окон')
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    data = load_cleaned(columns=report_columns)
+    memory_report(data)
+
+    # Расчет средней вилки зарплат (compensation_from и compensation_to)
+    data['average_compensation'] = (data['compensation_from'] + data['compensation_to']) / 2
+
+    # Все групповые статистики по всем разрезам считаются за один проход
+    report = aggregate(data, keys=['profession', 'resume_region', 'education_level'],
+                       values=['expected_salary', 'average_compensation'])
+
+    # Группировка данных по профессиям и расчет средней ожидаемой зарплаты
+    avg_salary_by_profession = report['profession']['expected_salary']['mean'].rename('expected_salary').sort_values(ascending=False)
+    print(f'Группировка данных по профессиям и расчет средней ожидаемой зарплаты: {avg_salary_by_profession}')
+    print('_____________________________________________________________________')
+
+    # Группировка данных по регионам и расчет средней зарплаты
+    avg_salary_by_region = report['resume_region']['expected_salary']['mean'].rename('expected_salary').sort_values(ascending=False)
+    print(f'Группировка данных по регионам и расчет средней зарплаты: {avg_salary_by_region}')
+    print('_____________________________________________________________________')
+
+    # Группировка данных по уровню образования и расчет средней зарплаты
+    avg_salary_by_education = report['education_level']['expected_salary']['mean'].rename('expected_salary').sort_values(ascending=False)
+    print(f'Группировка данных по уровню образования и расчет средней зарплаты: {avg_salary_by_education}')
+    print('_____________________________________________________________________')
 
+    # Группировка по профессиям и расчет средней вилки зарплат
+    avg_compensation_by_profession = report['profession']['average_compensation']['mean'].rename('average_compensation').sort_values(ascending=False)
+    print(f'Группировка по профессиям и расчет средней вилки зарплат: {avg_compensation_by_profession}')
+    print('_____________________________________________________________________')
 
-data = pd.read_csv('cleaned_hh_ru_dataset.csv')
-data_copy = data.copy()
-
-# Группировка данных по профессиям и расчет средней ожидаемой зарплаты
-avg_salary_by_profession = data.groupby('profession')['expected_salary'].mean().sort_values(ascending=False)
-print(f'Группировка данных по профессиям и расчет средней ожидаемой зарплаты: {avg_salary_by_profession}')
-print('_____________________________________________________________________')
-
-# Визуализация
-plt.figure(figsize=(12, 8))
-avg_salary_by_profession.head(20).plot(kind='bar', color='skyblue')  # Топ-20 профессий
-plt.title('Средняя ожидаемая зарплата по профессиям', fontsize=16)
-plt.xlabel('Профессия', fontsize=14)
-plt.ylabel('Средняя зарплата', fontsize=14)
-plt.xticks(rotation=45, ha='right')
-plt.grid(axis='y', linestyle='--', alpha=0.7)
-plt.tight_layout()
-plt.show()
-
-# Группировка данных по регионам и расчет средней зарплаты
-avg_salary_by_region = data.groupby('resume_region')['expected_salary'].mean().sort_values(ascending=False)
-print(f'Группировка данных по регионам и расчет средней зарплаты: {avg_salary_by_region}')
-print('_____________________________________________________________________')
-
-# Визуализация
-plt.figure(figsize=(12, 8))
-avg_salary_by_region.head(20).plot(kind='bar', color='lightgreen')  # Топ-20 регионов
-plt.title('Средняя ожидаемая зарплата по регионам', fontsize=16)
-plt.xlabel('Регион', fontsize=14)
-plt.ylabel('Средняя зарплата', fontsize=14)
-plt.xticks(rotation=45, ha='right')
-plt.grid(axis='y', linestyle='--', alpha=0.7)
-plt.tight_layout()
-plt.show()
-
-# Группировка данных по уровню образования и расчет средней зарплаты
-avg_salary_by_education = data.groupby('education_level')['expected_salary'].mean().sort_values(ascending=False)
-print(f'Группировка данных по уровню образования и расчет средней зарплаты: {avg_salary_by_education}')
-print('_____________________________________________________________________')
-
-
-# Визуализация
-plt.figure(figsize=(10, 6))
-sns.barplot(x=avg_salary_by_education.index, y=avg_salary_by_education.values, palette='viridis')
-plt.title('Средняя ожидаемая зарплата по уровню образования', fontsize=16)
-plt.xlabel('Уровень образования', fontsize=14)
-plt.ylabel('Средняя зарплата', fontsize=14)
-plt.xticks(rotation=45, ha='right')
-plt.grid(axis='y', linestyle='--', alpha=0.7)
-plt.tight_layout()
-plt.show()
-
-# Расчет средней вилки зарплат (compensation_from и compensation_to)
-data['average_compensation'] = (data['compensation_from'] + data['compensation_to']) / 2
-
-# Группировка по профессиям и расчет средней вилки зарплат
-avg_compensation_by_profession = data.groupby('profession')['average_compensation'].mean().sort_values(ascending=False)
-print(f'Группировка по профессиям и расчет средней вилки зарплат: {avg_compensation_by_profession}')
-print('_____________________________________________________________________')
-
-# Визуализация
-plt.figure(figsize=(12, 8))
-avg_compensation_by_profession.head(20).plot(kind='bar', color='purple')  # Топ-20 профессий
-plt.title('Средняя вилка зарплат по профессиям', fontsize=16)
-plt.xlabel('Профессия', fontsize=14)
-plt.ylabel('Средняя вилка зарплат', fontsize=14)
-plt.xticks(rotation=45, ha='right')
-plt.grid(axis='y', linestyle='--', alpha=0.7)
-plt.tight_layout()
-plt.show()
\ No newline at end of file
+    # Визуализация
+    plots = [
+        ('salary_by_profession', plot_top20,
+         (avg_salary_by_profession, 'Средняя ожидаемая зарплата по профессиям',
+          'Профессия', 'Средняя зарплата', 'skyblue'), {}),
+        ('salary_by_region', plot_top20,
+         (avg_salary_by_region, 'Средняя ожидаемая зарплата по регионам',
+          'Регион', 'Средняя зарплата', 'lightgreen'), {}),
+        ('salary_by_education', plot_education, (avg_salary_by_education,), {}),
+        ('compensation_by_profession', plot_top20,
+         (avg_compensation_by_profession, 'Средняя вилка зарплат по профессиям',
+          'Профессия', 'Средняя вилка зарплат', 'purple'), {}),
+    ]
+    if args.batch:
+        manifest = render_batch(plots, args.batch, args.workers)
+        print(f"Сохранено графиков: {len(manifest)} (список в {args.batch})")
+    else:
+        renderer = ScreenRenderer()
+        for _, plot, plot_args, plot_kwargs in plots:
+            plot(*plot_args, renderer=renderer, **plot_kwargs)
@@ -1,50 +1,262 @@
+import argparse
+import io
+import os
+import shutil
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import numpy as np
 
-# Загрузка датасета
-df = pd.read_csv('hh_ru_dataset.csv')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'common'))
+import Schema
+from Dedup import row_hashes
+from Pipeline import Pipeline, median_from_counts
+from DatasetIO import CLEANED_CSV, ParquetChunkWriter, parquet_path_for, save_parquet
 
-# Удаление дубликатов
-df.drop_duplicates(inplace=True)
+# Пути к исходному и очищенному датасетам
+INPUT_PATH = 'hh_ru_dataset.csv'
+OUTPUT_PATH = CLEANED_CSV
 
-# Обработка пропущенных значений для числовых столбцов
-numeric_columns = ['year_of_birth', 'expected_salary', 'work_experience_months', 'compensation_from', 'compensation_to']
-for col in numeric_columns:
-    if df[col].isnull().sum() > 0:
-        # Используем более явное присваивание
-        df[col] = df[col].fillna(df[col].median())
+# Форматы сохранения очищенного датасета
+OUTPUT_FORMATS = ('csv', 'parquet', 'both')
+
+# Размер блока (в строках) для потокового режима
+CHUNK_SIZE = 200_000
 
-# Обработка пропущенных значений для категориальных столбцов
+# Примерный размер части файла (в байтах) для параллельного режима
+PARTITION_BYTES = 256 * 1024 ** 2
+
+numeric_columns = ['year_of_birth', 'expected_salary', 'work_experience_months', 'compensation_from', 'compensation_to']
 categorical_columns = [
     'topic_id', 'topic_creation_date', 'initial_state', 'final_state', 'resume_id', 'resume_creation_date',
     'profession', 'gender', 'resume_region', 'education_level', 'relocation_status', 'business_trip_readiness',
     'work_schedule', 'resume_employment_type', 'resume_skills_list', 'vacancy_id', 'vacancy_creation_date',
     'vacancy_region', 'work_schedule.1', 'vacancy_employment_type', 'vacancy_skills_list'
 ]
-for col in categorical_columns:
-    if df[col].isnull().sum() > 0:
-        # Используем более явное присваивание
-        df[col] = df[col].fillna('Unknown')
-
-# Преобразование типов данных
-df['year_of_birth'] = df['year_of_birth'].astype(int)
-df['expected_salary'] = df['expected_salary'].astype(float)
-df['work_experience_months'] = df['work_experience_months'].astype(int)
-df['compensation_from'] = df['compensation_from'].astype(float)
-df['compensation_to'] = df['compensation_to'].astype(float)
-
-# Удаление аномалий (возраст меньше 18 или больше 100 лет)
-current_year = pd.Timestamp.now().year
-df = df[(df['year_of_birth'] >= 1923) & (df['year_of_birth'] <= 2005)]
-
-# Создание нового признака "age"
-df['age'] = current_year - df['year_of_birth']
-
-# Проверка результатов очистки
-print("Информация о датасете после очистки:")
-print(df.info())
-print("\nКоличество пропущенных значений после очистки:")
-print(df.isnull().sum())
-
-# Сохранение очищенного датасета (при необходимости)
-df.to_csv('cleaned_hh_ru_dataset.csv', index=False)
\ No newline at end of file
+
+
+def fill_categorical(df):
+    """Пропуски в категориальных столбцах заменяются на 'Unknown' (в столбцах дат остаются NaT)"""
+    filled = {}
+    for col in categorical_columns:
+        if col not in Schema.date_columns and df[col].isnull().sum() > 0:
+            column = df[col]
+            if isinstance(column.dtype, pd.CategoricalDtype) and 'Unknown' not in column.cat.categories:
+                column = column.cat.add_categories('Unknown')
+            filled[col] = column.fillna('Unknown')
+    return df.assign(**filled)
+
+
+def adult_age(df):
+    """Удаление аномалий (возраст меньше 18 или больше 100 лет)"""
+    return (df['year_of_birth'] >= 1923) & (df['year_of_birth'] <= 2005)
+
+
+def add_age(df):
+    """Создание нового признака age"""
+    current_year = pd.Timestamp.now().year
+    return df.assign(age=(current_year - df['year_of_birth']).astype(Schema.cleaned_dtypes['age']))
+
+
+def cleaning_pipeline(input_path=INPUT_PATH):
+    """Очистка датасета как конвейер: выполняется только при запросе результата"""
+    return (Pipeline.from_csv(input_path, reader=Schema.read_csv)
+            .drop_duplicates()
+            .fill_median(numeric_columns)
+            .map(fill_categorical)
+            # Преобразование типов данных по компактной схеме
+            .astype({col: Schema.cleaned_dtypes[col] for col in numeric_columns})
+            .filter(adult_age, 'adult_age')
+            .map(add_age))
+
+
+def clean_frame(df, medians):
+    """Очистка блока данных при известных медианах числовых столбцов"""
+    df = fill_categorical(df.fillna(medians))
+    df = df.astype({col: Schema.cleaned_dtypes[col] for col in numeric_columns})
+    return add_age(df[adult_age(df)])
+
+
+def clean_in_memory(input_path=INPUT_PATH, output_path=OUTPUT_PATH, output_format='csv'):
+    """Очистка датасета; небольшой файл обрабатывается целиком в памяти"""
+    pipeline = cleaning_pipeline(input_path)
+    df = pipeline.collect()
+    print(f"Удалено дубликатов: {pipeline.op('drop_duplicates').removed} из {pipeline.rows_read} строк")
+
+    # Проверка результатов очистки
+    print("Информация о датасете после очистки:")
+    print(df.info())
+    print("\nКоличество пропущенных значений после очистки:")
+    print(df.isnull().sum())
+    Schema.memory_report(df)
+
+    # Сохранение очищенного датасета (при необходимости)
+    if output_format in ('csv', 'both'):
+        df.to_csv(output_path, index=False)
+    if output_format in ('parquet', 'both'):
+        save_parquet(df, parquet_path_for(output_path))
+
+
+# =============================================
+# Потоковый режим для датасетов, не помещающихся в память
+# =============================================
+
+def clean_streaming(input_path=INPUT_PATH, output_path=OUTPUT_PATH, chunksize=CHUNK_SIZE,
+                    output_format='csv'):
+    """Потоковая очистка тем же конвейером: проход для медиан и проход с записью результата"""
+    pipeline = cleaning_pipeline(input_path)
+
+    header = True
+    with ParquetChunkWriter(parquet_path_for(output_path)) as parquet_writer:
+        for cleaned in pipeline.stream(chunksize):
+            if output_format in ('csv', 'both'):
+                cleaned.to_csv(output_path, mode='w' if header else 'a', header=header, index=False)
+            if output_format in ('parquet', 'both'):
+                parquet_writer.write(cleaned)
+            header = False
+
+    print("Потоковая очистка завершена:")
+    print(f"Прочитано строк: {pipeline.rows_read}")
+    print(f"Удалено дубликатов: {pipeline.op('drop_duplicates').removed}")
+    print(f"Записано строк: {pipeline.rows_written}")
+    print("Медианы числовых столбцов:")
+    for col, value in pipeline.op('fill_median').medians.items():
+        print(f"  {col}: {value}")
+
+
+# =============================================
+# Параллельный режим: части файла по диапазонам байт
+# =============================================
+
+def _byte_ranges(input_path, parts):
+    """Заголовок CSV и диапазоны байт частей, выровненные по началу строк
+
+    Предполагается, что внутри значений нет переводов строк.
+    """
+    size = os.path.getsize(input_path)
+    with open(input_path, 'rb') as f:
+        header = f.readline()
+        data_start = f.tell()
+        bounds = [data_start]
+        for i in range(1, parts):
+            f.seek(data_start + (size - data_start) * i // parts - 1)
+            # Дочитываем строку, в которую попала граница
+            f.readline()
+            bounds.append(f.tell())
+        bounds.append(size)
+    bounds = sorted(set(bounds))
+    return header, list(zip(bounds[:-1], bounds[1:]))
+
+
+def _partition_path(tmp_dir, index, suffix):
+    return os.path.join(tmp_dir, f'part_{index:05d}.{suffix}')
+
+
+def _parse_partition(task):
+    """Этап 1: разбор части CSV и хэши её строк"""
+    input_path, header, (start, end), tmp_dir, index = task
+    with open(input_path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    df = Schema.read_csv(io.BytesIO(header + data))
+    # Разобранная часть сохраняется в бинарном виде для следующих этапов
+    df.to_pickle(_partition_path(tmp_dir, index, 'pkl'))
+    return row_hashes(df)
+
+
+def _partition_counts(task):
+    """Этап 2: частоты значений числовых столбцов без дубликатов"""
+    tmp_dir, index, keep = task
+    df = pd.read_pickle(_partition_path(tmp_dir, index, 'pkl'))[keep]
+    return {col: df[col].value_counts() for col in numeric_columns}
+
+
+def _clean_partition(task):
+    """Этап 3: очистка части с глобальными медианами и запись результата"""
+    tmp_dir, index, keep, medians, output_format = task
+    path = _partition_path(tmp_dir, index, 'pkl')
+    cleaned = clean_frame(pd.read_pickle(path)[keep].copy(), medians)
+    os.remove(path)
+    if output_format in ('csv', 'both'):
+        cleaned.to_csv(_partition_path(tmp_dir, index, 'csv'), header=False, index=False)
+    if output_format in ('parquet', 'both'):
+        cleaned.to_pickle(_partition_path(tmp_dir, index, 'pkl'))
+    return len(cleaned), list(cleaned.columns)
+
+
+def clean_parallel(input_path=INPUT_PATH, output_path=OUTPUT_PATH, workers=None,
+                   output_format='csv'):
+    """Очистка частей файла в пуле процессов с общими медианами и дедупликацией"""
+    workers = workers or os.cpu_count()
+    parts = max(workers, -(-os.path.getsize(input_path) // PARTITION_BYTES))
+    header, ranges = _byte_ranges(input_path, parts)
+
+    tmp_dir = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(output_path)))
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            hashes = list(pool.map(_parse_partition, [
+                (input_path, header, byte_range, tmp_dir, i) for i, byte_range in enumerate(ranges)
+            ]))
+
+            # Глобальная дедупликация: части идут в порядке файла,
+            # поэтому сохраняется первое вхождение строки, как в обычном режиме
+            keep_all = ~pd.Series(np.concatenate(hashes)).duplicated().to_numpy()
+            keeps = np.split(keep_all, np.cumsum([len(h) for h in hashes])[:-1])
+
+            value_counts = {col: pd.Series(dtype='int64') for col in numeric_columns}
+            for counts in pool.map(_partition_counts, [
+                (tmp_dir, i, keep) for i, keep in enumerate(keeps)
+            ]):
+                for col in numeric_columns:
+                    value_counts[col] = value_counts[col].add(counts[col], fill_value=0)
+            medians = {col: median_from_counts(value_counts[col]) for col in numeric_columns}
+
+            results = list(pool.map(_clean_partition, [
+                (tmp_dir, i, keep, medians, output_format) for i, keep in enumerate(keeps)
+            ]))
+
+        # Сборка частей в итоговые файлы
+        if output_format in ('csv', 'both'):
+            # Заголовок пишется тем же to_csv, что и части
+            pd.DataFrame(columns=results[0][1]).to_csv(output_path, index=False)
+            with open(output_path, 'ab') as out:
+                for i in range(len(ranges)):
+                    with open(_partition_path(tmp_dir, i, 'csv'), 'rb') as part:
+                        shutil.copyfileobj(part, out)
+        if output_format in ('parquet', 'both'):
+            with ParquetChunkWriter(parquet_path_for(output_path)) as parquet_writer:
+                for i in range(len(ranges)):
+                    parquet_writer.write(pd.read_pickle(_partition_path(tmp_dir, i, 'pkl')))
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    rows_read = sum(len(h) for h in hashes)
+    print("Параллельная очистка завершена:")
+    print(f"Частей файла: {len(ranges)}, процессов: {workers}")
+    print(f"Прочитано строк: {rows_read}")
+    print(f"Удалено дубликатов: {rows_read - int(keep_all.sum())}")
+    print(f"Записано строк: {sum(rows for rows, _ in results)}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Очистка датасета hh.ru')
+    parser.add_argument('--input', default=INPUT_PATH)
+    parser.add_argument('--output', default=OUTPUT_PATH,
+                        help='путь очищенного CSV; Parquet пишется рядом с тем же именем')
+    parser.add_argument('--stream', action='store_true',
+                        help='читать датасет блоками (ограниченный расход памяти)')
+    parser.add_argument('--chunksize', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--workers', type=int, default=0,
+                        help='число процессов для параллельной очистки (0 - выключено)')
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='csv',
+                        help='формат очищенного датасета (parquet требует pyarrow)')
+    args = parser.parse_args()
+
+    if args.workers:
+        clean_parallel(args.input, args.output, args.workers, args.format)
+    elif args.stream:
+        clean_streaming(args.input, args.output, args.chunksize, args.format)
+    else:
+        clean_in_memory(args.input, args.output, args.format)
@@ -0,0 +1,92 @@
+import os
+
+import pandas as pd
+
+import Schema
+
+
+def parquet_path_for(csv_path):
+    """Parquet-версия очищенного датасета лежит рядом с CSV под тем же именем"""
+    return os.path.splitext(csv_path)[0] + '.parquet'
+
+
+# Файлы очищенного датасета
+CLEANED_CSV = 'cleaned_hh_ru_dataset.csv'
+CLEANED_PARQUET = parquet_path_for(CLEANED_CSV)
+
+# Столбцы, которые хранятся со словарным кодированием (категории)
+dictionary_columns = Schema.category_columns
+
+
+def _with_categories(df):
+    """Перевод словарных столбцов в категориальный тип"""
+    return df.astype({col: 'category' for col in dictionary_columns if col in df.columns})
+
+
+def save_parquet(df, path=CLEANED_PARQUET):
+    """Сохранение очищенного датасета в Parquet"""
+    _with_categories(df).to_parquet(path, index=False)
+
+
+class ParquetChunkWriter:
+    """Постепенная запись блоков датасета в один Parquet-файл"""
+
+    def __init__(self, path=CLEANED_PARQUET):
+        self.path = path
+        self._writer = None
+        self._schema = None
+
+    def write(self, df):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.Table.from_pandas(_with_categories(df), preserve_index=False)
+        if self._writer is None:
+            # Разрядность индексов словаря зависит от числа категорий в блоке,
+            # поэтому для всех блоков фиксируется int32
+            fields = [
+                pa.field(field.name, pa.dictionary(pa.int32(), pa.string()))
+                if pa.types.is_dictionary(field.type) else field
+                for field in table.schema
+            ]
+            self._schema = pa.schema(fields, metadata=table.schema.metadata)
+            self._writer = pq.ParquetWriter(self.path, self._schema)
+        self._writer.write_table(table.cast(self._schema))
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def cleaned_path(csv_path=CLEANED_CSV, parquet_path=None):
+    """Файл очищенного датасета для чтения: последний записанный из CSV и Parquet
+
+    Оба файла могут остаться от разных запусков очистки (--format csv после
+    --format parquet), поэтому берётся более новый по времени изменения.
+    """
+    parquet_path = parquet_path or parquet_path_for(csv_path)
+    existing = [path for path in (parquet_path, csv_path) if os.path.exists(path)]
+    if not existing:
+        return csv_path
+    return max(existing, key=os.path.getmtime)
+
+
+def source_stamp(path):
+    """Отметка версии файла для проверки сохранённых индексов: путь, размер и время изменения"""
+    stat = os.stat(path)
+    return [os.path.abspath(path), stat.st_size, stat.st_mtime_ns]
+
+
+def load_cleaned(columns=None, csv_path=CLEANED_CSV, parquet_path=None):
+    """Загрузка очищенного датасета из более свежего файла (Parquet или CSV)"""
+    path = cleaned_path(csv_path, parquet_path)
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path, columns=columns)
+    return Schema.read_csv(path, usecols=columns, cleaned=True)
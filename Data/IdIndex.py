@@ -0,0 +1,136 @@
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from DatasetIO import cleaned_path, load_cleaned, source_stamp
+
+# Файл индексов (рядом с очищенным датасетом)
+INDEX_PATH = 'cleaned_hh_ru_dataset.idx.npz'
+
+# Столбцы, по которым строятся индексы
+INDEX_COLUMNS = ['topic_id', 'resume_id', 'vacancy_id', 'resume_region', 'vacancy_region']
+
+
+class SortedIndex:
+    """Отсортированные ключи столбца и номера строк для каждого ключа
+
+    Поиск ключа - бинарный поиск по keys, строки ключа - непрерывный
+    срез rows[offsets[i]:offsets[i + 1]].
+    """
+
+    def __init__(self, keys, offsets, rows):
+        self.keys = keys
+        self.offsets = offsets
+        self.rows = rows
+
+    @classmethod
+    def build(cls, column):
+        # Ключи хранятся строками: так поиск не зависит от типа, с которым прочитан столбец
+        codes, keys = pd.factorize(column.astype(str).where(column.notna()), sort=True)
+        order = np.argsort(codes, kind='stable')
+        # Строки без ключа (код -1) оказываются в начале и в индекс не попадают
+        order = order[np.count_nonzero(codes < 0):]
+        counts = np.bincount(codes[codes >= 0], minlength=len(keys))
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        row_dtype = np.int32 if len(column) < np.iinfo(np.int32).max else np.int64
+        return cls(np.asarray(keys, dtype=str), offsets.astype(np.int64), order.astype(row_dtype))
+
+    def lookup(self, key):
+        """Номера строк с данным ключом (пустой массив, если ключа нет)"""
+        key = str(key)
+        i = np.searchsorted(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            return self.rows[self.offsets[i]:self.offsets[i + 1]]
+        return self.rows[:0]
+
+    def counts(self):
+        """Число строк для каждого ключа"""
+        return pd.Series(np.diff(self.offsets), index=self.keys)
+
+
+class DatasetIndex:
+    """Набор индексов очищенного датасета, сохраняемый в один .npz
+
+    Вместе с индексами хранится отметка файла датасета (путь, размер, время
+    изменения): сохранённый индекс годится, только пока файл не переписан.
+    """
+
+    def __init__(self, indexes, n_rows, source=None):
+        self.indexes = indexes
+        self.n_rows = n_rows
+        self.source = source
+
+    @classmethod
+    def build(cls, df, columns=INDEX_COLUMNS, source_path=None):
+        source = source_stamp(source_path) if source_path else None
+        return cls({col: SortedIndex.build(df[col]) for col in columns}, len(df), source)
+
+    def is_current(self, source_path):
+        """Индекс построен по текущей версии файла датасета"""
+        return self.source is not None and self.source == source_stamp(source_path)
+
+    @classmethod
+    def load_current(cls, source_path, path=INDEX_PATH):
+        """Сохранённый индекс, если он есть и построен по текущей версии датасета, иначе None"""
+        if not os.path.exists(path):
+            return None
+        index = cls.load(path)
+        return index if index.is_current(source_path) else None
+
+    def save(self, path=INDEX_PATH):
+        arrays = {'n_rows': np.array(self.n_rows), 'source': np.array(json.dumps(self.source))}
+        for col, index in self.indexes.items():
+            arrays[f'{col}/keys'] = index.keys
+            arrays[f'{col}/offsets'] = index.offsets
+            arrays[f'{col}/rows'] = index.rows
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path=INDEX_PATH):
+        with np.load(path) as arrays:
+            columns = {name.split('/')[0] for name in arrays.files if '/' in name}
+            indexes = {col: SortedIndex(arrays[f'{col}/keys'], arrays[f'{col}/offsets'],
+                                        arrays[f'{col}/rows'])
+                       for col in columns}
+            source = json.loads(str(arrays['source'])) if 'source' in arrays.files else None
+            return cls(indexes, int(arrays['n_rows']), source)
+
+    def rows(self, column, key):
+        return self.indexes[column].lookup(key)
+
+    def select(self, df, column, key):
+        """Строки датасета с данным значением столбца без полного просмотра"""
+        if len(df) != self.n_rows:
+            raise ValueError("Индекс построен для другой версии датасета, постройте его заново")
+        return df.iloc[self.rows(column, key)]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Индексы hh.ru по идентификаторам и регионам')
+    parser.add_argument('--vacancy', help='показать отклики на вакансию vacancy_id')
+    parser.add_argument('--region', help='показать резюме из региона resume_region')
+    parser.add_argument('--rebuild', action='store_true',
+                        help='построить индексы заново, даже если сохранённые актуальны')
+    args = parser.parse_args()
+
+    source_path = cleaned_path()
+    data = load_cleaned()
+    index = None if args.rebuild else DatasetIndex.load_current(source_path)
+    if index is None:
+        index = DatasetIndex.build(data, source_path=source_path)
+        index.save()
+        print("Индексы построены и сохранены")
+    else:
+        print("Индексы загружены из сохранённого файла")
+    for col, column_index in index.indexes.items():
+        print(f"{col}: {len(column_index.keys)} ключей")
+
+    if args.vacancy:
+        print(index.select(data, 'vacancy_id', args.vacancy))
+    if args.region:
+        rows = index.select(data, 'resume_region', args.region)
+        print(f"\nРезюме из региона '{args.region}': {len(rows)}")
+        print(rows.groupby('profession', observed=True)['expected_salary'].mean())
@@ -0,0 +1,75 @@
+import pandas as pd
+
+# =============================================
+# Компактная схема типов датасета hh.ru
+# =============================================
+
+# Категориальные столбцы с небольшим числом различных значений
+category_columns = [
+    'initial_state', 'final_state', 'profession', 'gender', 'resume_region', 'education_level',
+    'relocation_status', 'business_trip_readiness', 'work_schedule', 'resume_employment_type',
+    'vacancy_region', 'work_schedule.1', 'vacancy_employment_type'
+]
+
+# Даты разбираются при чтении
+date_columns = ['topic_creation_date', 'resume_creation_date', 'vacancy_creation_date']
+
+# Идентификаторы и списки навыков: почти все значения уникальны,
+# категории здесь не экономят память
+text_columns = ['topic_id', 'resume_id', 'vacancy_id', 'resume_skills_list', 'vacancy_skills_list']
+
+# Типы при чтении: числовые столбцы ещё могут содержать пропуски
+read_dtypes = {
+    'year_of_birth': 'float32',
+    'work_experience_months': 'float32',
+    # Зарплаты - целые рубли, float32 хранит их точно до 16 млн
+    'expected_salary': 'float32',
+    'compensation_from': 'float32',
+    'compensation_to': 'float32',
+}
+read_dtypes.update({col: 'category' for col in category_columns})
+read_dtypes.update({col: 'object' for col in text_columns})
+
+# Типы после очистки (пропуски заполнены)
+cleaned_dtypes = dict(read_dtypes)
+cleaned_dtypes.update({
+    'year_of_birth': 'int16',
+    'work_experience_months': 'int16',
+    'age': 'int16',
+})
+
+
+def read_csv(path, usecols=None, cleaned=False, **kwargs):
+    """Чтение CSV датасета сразу в компактных типах"""
+    dtypes = cleaned_dtypes if cleaned else read_dtypes
+    dates = date_columns
+    if usecols is not None:
+        dtypes = {col: dtype for col, dtype in dtypes.items() if col in usecols}
+        dates = [col for col in dates if col in usecols]
+    return pd.read_csv(path, usecols=usecols, dtype=dtypes, parse_dates=dates, **kwargs)
+
+
+def _default_memory(series):
+    """Объём столбца в типах, которые pandas выбирает по умолчанию"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.astype(object).memory_usage(deep=True, index=False)
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series.astype(str).astype(object).memory_usage(deep=True, index=False)
+    if pd.api.types.is_numeric_dtype(series):
+        return len(series) * 8
+    return series.memory_usage(deep=True, index=False)
+
+
+def memory_report(df):
+    """Сравнение памяти датафрейма в компактных типах и в типах по умолчанию"""
+    # Столбцы пересчитываются по одному, чтобы не держать в памяти вторую копию
+    report = pd.DataFrame({
+        'dtype': df.dtypes.astype(str),
+        'before_mb': [_default_memory(df[col]) / 1024 ** 2 for col in df.columns],
+        'after_mb': df.memory_usage(deep=True, index=False) / 1024 ** 2,
+    })
+    before, after = report['before_mb'].sum(), report['after_mb'].sum()
+    print("\nПамять датафрейма по столбцам (МБ):")
+    print(report.round(2).to_string())
+    print(f"Итого: {before:.1f} МБ -> {after:.1f} МБ (в {before / max(after, 1e-9):.1f} раза меньше)")
+    return report
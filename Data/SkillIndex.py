@@ -0,0 +1,168 @@
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from DatasetIO import cleaned_path, load_cleaned, source_stamp
+
+# Префикс файлов индекса навыков (рядом с очищенным датасетом)
+INDEX_PREFIX = 'cleaned_hh_ru_dataset.skills'
+
+# Разделители навыков внутри списка и служебные символы вокруг них
+SKILL_SEPARATORS = r'[,;|\n]'
+SKILL_STRIP = r'[\[\]\'"]'
+
+
+def _explode_skills(series):
+    """Series навыков по одному в строке; индекс - номер строки датасета"""
+    skills = (series.astype(object).where(series.notna() & (series != 'Unknown'), '')
+              .astype(str).str.replace(SKILL_STRIP, '', regex=True)
+              .str.split(SKILL_SEPARATORS).explode().str.strip().str.lower())
+    return skills[skills != '']
+
+
+def _skill_matrix(rows, codes, n_rows, n_skills):
+    """Разреженная бинарная матрица строки x навыки"""
+    matrix = sparse.csr_matrix((np.ones(len(codes), dtype=np.int8), (rows, codes)),
+                               shape=(n_rows, n_skills))
+    # Повторы навыка в одном списке считаются один раз
+    matrix.data[:] = 1
+    return matrix
+
+
+class SkillIndex:
+    """Навыки резюме и вакансий в виде CSR-матриц и обратный индекс навык -> строки
+
+    Как и DatasetIndex, хранит отметку файла датасета, по которому построен.
+    """
+
+    def __init__(self, vocabulary, resumes, vacancies, source=None):
+        self.vocabulary = pd.Index(vocabulary)
+        self.source = source
+        self.resumes = resumes.tocsr()
+        self.vacancies = vacancies.tocsr()
+        # Обратный индекс: столбцы CSC-матриц - списки строк для каждого навыка
+        self._resumes_by_skill = self.resumes.tocsc()
+        self._vacancies_by_skill = self.vacancies.tocsc()
+
+    @classmethod
+    def build(cls, df, source_path=None):
+        """Токенизация resume_skills_list и vacancy_skills_list с общим словарём"""
+        resume_skills = _explode_skills(df['resume_skills_list'].reset_index(drop=True))
+        vacancy_skills = _explode_skills(df['vacancy_skills_list'].reset_index(drop=True))
+
+        codes, vocabulary = pd.factorize(pd.concat([resume_skills, vacancy_skills]), sort=True)
+        n_resume = len(resume_skills)
+        shape = (len(df), len(vocabulary))
+        resumes = _skill_matrix(resume_skills.index.to_numpy(), codes[:n_resume], *shape)
+        vacancies = _skill_matrix(vacancy_skills.index.to_numpy(), codes[n_resume:], *shape)
+        source = source_stamp(source_path) if source_path else None
+        return cls(vocabulary, resumes, vacancies, source)
+
+    def save(self, prefix=INDEX_PREFIX):
+        sparse.save_npz(f'{prefix}.resumes.npz', self.resumes)
+        sparse.save_npz(f'{prefix}.vacancies.npz', self.vacancies)
+        np.save(f'{prefix}.vocabulary.npy', self.vocabulary.to_numpy(dtype=str))
+        with open(f'{prefix}.source.json', 'w', encoding='utf-8') as f:
+            json.dump(self.source, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, prefix=INDEX_PREFIX):
+        source = None
+        if os.path.exists(f'{prefix}.source.json'):
+            with open(f'{prefix}.source.json', encoding='utf-8') as f:
+                source = json.load(f)
+        return cls(np.load(f'{prefix}.vocabulary.npy'),
+                   sparse.load_npz(f'{prefix}.resumes.npz'),
+                   sparse.load_npz(f'{prefix}.vacancies.npz'),
+                   source)
+
+    def is_current(self, source_path):
+        """Индекс построен по текущей версии файла датасета"""
+        return self.source is not None and self.source == source_stamp(source_path)
+
+    @classmethod
+    def load_current(cls, source_path, prefix=INDEX_PREFIX):
+        """Сохранённый индекс, если он есть и построен по текущей версии датасета, иначе None"""
+        if not os.path.exists(f'{prefix}.vocabulary.npy'):
+            return None
+        index = cls.load(prefix)
+        return index if index.is_current(source_path) else None
+
+    def skill_id(self, skill):
+        """Номер навыка в словаре или None, если такого навыка нет"""
+        skill = skill.strip().lower()
+        return self.vocabulary.get_loc(skill) if skill in self.vocabulary else None
+
+    def rows_with_skill(self, skill, side='resume'):
+        """Номера строк, в которых у резюме (или вакансии) есть навык (пусто для неизвестного)"""
+        index = self._resumes_by_skill if side == 'resume' else self._vacancies_by_skill
+        skill_id = self.skill_id(skill)
+        if skill_id is None:
+            return index.indices[:0]
+        return index.indices[index.indptr[skill_id]:index.indptr[skill_id + 1]]
+
+    def mean_for_skill(self, values, skill):
+        """Среднее значение (например, expected_salary) по резюме с навыком (NaN, если таких нет)"""
+        rows = self.rows_with_skill(skill)
+        return float(np.mean(np.asarray(values)[rows])) if len(rows) else np.nan
+
+    def mean_by_skill(self, values, min_count=1):
+        """Среднее значение по резюме для всех навыков сразу"""
+        values = np.asarray(values, dtype=np.float64)
+        counts = np.asarray(self.resumes.sum(axis=0)).ravel()
+        sums = self.resumes.T.astype(np.float64) @ values
+        with np.errstate(invalid='ignore', divide='ignore'):
+            result = pd.DataFrame({'count': counts, 'mean': sums / counts}, index=self.vocabulary)
+        return result[result['count'] >= min_count].sort_values('mean', ascending=False)
+
+    def overlap(self, resume_rows=None, vacancy_rows=None):
+        """Совпадение навыков пар резюме-вакансия: число общих навыков и коэффициент Жаккара
+
+        По умолчанию сравниваются резюме и вакансия из одной строки датасета.
+        """
+        resumes = self.resumes if resume_rows is None else self.resumes[resume_rows]
+        vacancies = self.vacancies if vacancy_rows is None else self.vacancies[vacancy_rows]
+        common = np.asarray(resumes.multiply(vacancies).sum(axis=1)).ravel()
+        union = (np.asarray(resumes.sum(axis=1)).ravel()
+                 + np.asarray(vacancies.sum(axis=1)).ravel() - common)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            jaccard = np.where(union > 0, common / union, 0.0)
+        return pd.DataFrame({'common_skills': common, 'jaccard': jaccard})
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Индекс навыков резюме и вакансий hh.ru')
+    parser.add_argument('--skill', help='навык для запроса средней ожидаемой зарплаты')
+    parser.add_argument('--rebuild', action='store_true',
+                        help='построить индекс заново, даже если сохранённый актуален')
+    args = parser.parse_args()
+
+    source_path = cleaned_path()
+    data = load_cleaned(columns=['resume_skills_list', 'vacancy_skills_list', 'expected_salary'])
+    index = None if args.rebuild else SkillIndex.load_current(source_path)
+    if index is None:
+        index = SkillIndex.build(data, source_path=source_path)
+        index.save()
+        print("Индекс навыков построен и сохранён")
+    else:
+        print("Индекс навыков загружен из сохранённых файлов")
+    print(f"Навыков в словаре: {len(index.vocabulary)}")
+
+    print("\nСредняя ожидаемая зарплата по навыкам (топ-20):")
+    print(index.mean_by_skill(data['expected_salary']).head(20))
+
+    overlap = index.overlap()
+    print(f"\nСреднее число общих навыков резюме и вакансии: {overlap['common_skills'].mean():.2f}")
+    print(f"Средний коэффициент Жаккара: {overlap['jaccard'].mean():.3f}")
+
+    if args.skill:
+        rows = index.rows_with_skill(args.skill)
+        if len(rows):
+            print(f"\nРезюме с навыком '{args.skill}': {len(rows)}, "
+                  f"средняя ожидаемая зарплата: {index.mean_for_skill(data['expected_salary'], args.skill):.0f}")
+        else:
+            print(f"\nРезюме с навыком '{args.skill}': 0")
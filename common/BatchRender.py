@@ -0,0 +1,106 @@
+import contextlib
+import io
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib.pyplot as plt
+
+# Файл со списком построенных изображений
+MANIFEST_NAME = 'manifest.json'
+
+
+class ScreenRenderer:
+    """Показ графиков в окне (поведение по умолчанию)"""
+
+    def show(self):
+        plt.show()
+
+
+class FileRenderer:
+    """Сохранение всех открытых фигур в файлы вместо показа"""
+
+    def __init__(self, out_dir, prefix='plot', dpi=100):
+        self.out_dir = out_dir
+        self.prefix = prefix
+        self.dpi = dpi
+        self.manifest = []
+
+    def show(self):
+        for num in plt.get_fignums():
+            fig = plt.figure(num)
+            path = os.path.join(self.out_dir, f'{self.prefix}_{len(self.manifest):02d}.png')
+            fig.savefig(path, dpi=self.dpi, bbox_inches='tight')
+            self.manifest.append({'path': path, 'title': _figure_title(fig)})
+        plt.close('all')
+
+
+def _figure_title(fig):
+    """Заголовок фигуры: suptitle или заголовок первой оси"""
+    if fig.get_suptitle():
+        return fig.get_suptitle()
+    for ax in fig.axes:
+        if ax.get_title():
+            return ax.get_title()
+    return ''
+
+
+def _safe_name(name):
+    return re.sub(r'[^\w.-]+', '_', name).strip('_')
+
+
+def _init_worker():
+    # Рабочие процессы рисуют без окон
+    plt.switch_backend('Agg')
+
+
+def _render_job(task):
+    """Выполнение одного задания в рабочем процессе"""
+    index, name, func, args, kwargs, out_dir, dpi = task
+    renderer = FileRenderer(out_dir, prefix=f'{index:03d}_{_safe_name(name)}', dpi=dpi)
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        func(*args, renderer=renderer, **kwargs)
+    return [dict(entry, job=name, log=log.getvalue()) for entry in renderer.manifest] or \
+        [{'job': name, 'path': None, 'title': '', 'log': log.getvalue()}]
+
+
+def render_pool(workers=None):
+    """Пул процессов для render_batch, который можно передать в несколько вызовов подряд"""
+    return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+
+
+def render_batch(jobs, out_dir, workers=None, dpi=100, echo=True, pool=None):
+    """Параллельная отрисовка заданий в файлы с бэкендом Agg
+
+    jobs - список (имя, функция, args, kwargs); функция получает
+    именованный аргумент renderer и вызывает renderer.show() вместо plt.show().
+    pool - готовый пул из render_pool (иначе создаётся свой на время вызова).
+    Возвращает манифест: список словарей с путём, заголовком и текстовым выводом задания.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    tasks = [(i, name, func, args, kwargs, out_dir, dpi)
+             for i, (name, func, args, kwargs) in enumerate(jobs)]
+
+    manifest = []
+    with contextlib.nullcontext(pool) if pool else render_pool(workers) as pool:
+        # map сохраняет порядок заданий, поэтому текстовый вывод идёт в исходном порядке
+        for entries in pool.map(_render_job, tasks):
+            if echo and entries[0]['log']:
+                print(entries[0]['log'], end='')
+            manifest.extend(entries)
+
+    with open(os.path.join(out_dir, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump([{key: entry[key] for key in ('job', 'path', 'title')} for entry in manifest],
+                  f, ensure_ascii=False, indent=2)
+    return manifest
+
+
+def call_method(cls, df, method, *args, renderer, options=None, **kwargs):
+    """Задание для render_batch: метод объекта-анализатора, созданного в рабочем процессе
+
+    options - именованные аргументы конструктора: настройки и уже посчитанные
+    данные анализатора из родительского процесса.
+    """
+    return getattr(cls(df, renderer=renderer, **(options or {})), method)(*args, **kwargs)
@@ -0,0 +1,120 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.stats import chi2 as chi2_distribution, chi2_contingency
+
+# Размер блока (в строках) при чтении файлов
+CHUNK_SIZE = 500_000
+
+
+class ContingencyBuilder:
+    """Таблица сопряженности двух категориальных столбцов, накапливаемая по блокам
+
+    Категории кодируются целыми числами по мере появления, счётчики хранятся
+    в разреженной матрице, поэтому память зависит от числа непустых ячеек,
+    а не от числа строк.
+    """
+
+    def __init__(self, col1, col2):
+        self.col1 = col1
+        self.col2 = col2
+        self.labels1 = {}
+        self.labels2 = {}
+        self.counts = sparse.csr_matrix((0, 0), dtype=np.int64)
+
+    @staticmethod
+    def _encode(values, labels):
+        """Глобальные коды значений блока; новые значения добавляются в словарь"""
+        codes, uniques = pd.factorize(values)
+        # Цикл только по различным значениям блока
+        mapping = np.array([labels.setdefault(value, len(labels)) for value in uniques], dtype=np.int64)
+        return mapping[codes]
+
+    def update(self, chunk):
+        """Добавление блока строк (строки с пропусками пропускаются, как в crosstab)"""
+        chunk = chunk[[self.col1, self.col2]].dropna()
+        rows = self._encode(chunk[self.col1].to_numpy(), self.labels1)
+        cols = self._encode(chunk[self.col2].to_numpy(), self.labels2)
+        shape = (len(self.labels1), len(self.labels2))
+
+        block = sparse.csr_matrix((np.ones(len(rows), dtype=np.int64), (rows, cols)), shape=shape)
+        self.counts.resize(shape)
+        self.counts = self.counts + block
+        return self
+
+    @classmethod
+    def from_frame(cls, df, col1, col2):
+        return cls(col1, col2).update(df)
+
+    @classmethod
+    def from_csv(cls, path, col1, col2, chunksize=CHUNK_SIZE):
+        builder = cls(col1, col2)
+        for chunk in pd.read_csv(path, usecols=[col1, col2], chunksize=chunksize):
+            builder.update(chunk)
+        return builder
+
+    @classmethod
+    def from_parquet(cls, path, col1, col2, chunksize=CHUNK_SIZE):
+        import pyarrow.parquet as pq
+
+        builder = cls(col1, col2)
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=[col1, col2]):
+            builder.update(batch.to_pandas())
+        return builder
+
+    @classmethod
+    def from_file(cls, path, col1, col2, chunksize=CHUNK_SIZE):
+        if str(path).endswith('.parquet'):
+            return cls.from_parquet(path, col1, col2, chunksize)
+        return cls.from_csv(path, col1, col2, chunksize)
+
+    def to_frame(self):
+        """Плотная таблица сопряженности (только для небольшого числа категорий)"""
+        return pd.DataFrame(self.counts.toarray(),
+                            index=pd.Index(list(self.labels1), name=self.col1),
+                            columns=pd.Index(list(self.labels2), name=self.col2))
+
+    def chi_square(self, correction=True):
+        """Хи-квадрат и V Крамера по накопленным счётчикам
+
+        Используется тождество chi2 = sum(O^2 / E) - N, в котором участвуют
+        только непустые ячейки. Для таблиц 2x2 с correction, как и в
+        chi2_contingency, применяется поправка Йейтса.
+        """
+        n_rows, n_cols = self.counts.shape
+        dof = (n_rows - 1) * (n_cols - 1)
+        total = self.counts.sum()
+
+        if dof == 1 and correction:
+            chi2, p, dof, _ = chi2_contingency(self.counts.toarray(), correction=True)
+        elif dof == 0:
+            chi2, p = 0.0, 1.0
+        else:
+            observed = self.counts.tocoo()
+            row_sums = np.asarray(self.counts.sum(axis=1)).ravel()
+            col_sums = np.asarray(self.counts.sum(axis=0)).ravel()
+            expected = row_sums[observed.row] * col_sums[observed.col] / total
+            chi2 = float((observed.data.astype(np.float64) ** 2 / expected).sum() - total)
+            p = float(chi2_distribution.sf(chi2, dof))
+
+        min_dim = min(n_rows, n_cols)
+        cramers_v = np.sqrt(chi2 / (total * (min_dim - 1))) if min_dim > 1 else 0.0
+        return {'chi2': chi2, 'p': p, 'dof': dof, 'cramers_v': cramers_v, 'n': int(total),
+                'shape': (n_rows, n_cols), 'nonzero': self.counts.nnz}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Хи-квадрат для двух категориальных столбцов файла')
+    parser.add_argument('path', help='CSV или Parquet')
+    parser.add_argument('col1')
+    parser.add_argument('col2')
+    parser.add_argument('--chunksize', type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    result = ContingencyBuilder.from_file(args.path, args.col1, args.col2, args.chunksize).chi_square()
+    print(f"Строк: {result['n']}, категорий: {result['shape'][0]} x {result['shape'][1]}, "
+          f"непустых ячеек: {result['nonzero']}")
+    print(f"Хи-квадрат: {result['chi2']:.3f}, p-value: {result['p']:.3e}, "
+          f"степени свободы: {result['dof']}, V Крамера: {result['cramers_v']:.3f}")
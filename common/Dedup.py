@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+
+
+def row_hashes(df, subset=None):
+    """64-битные хэши строк (по всем столбцам или по ключевым)"""
+    if subset is not None:
+        df = df[list(subset)]
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+
+def _same_rows(df, rows, other_rows):
+    """Поэлементное сравнение пар строк; пропуски считаются равными"""
+    equal = np.ones(len(rows), dtype=bool)
+    for col in df.columns:
+        a = df[col].iloc[rows].to_numpy()
+        b = df[col].iloc[other_rows].to_numpy()
+        equal &= (a == b) | (pd.isna(a) & pd.isna(b))
+    return equal
+
+
+def duplicate_mask(df, subset=None, check_collisions=True, return_hashes=False):
+    """Маска повторных строк (первое вхождение не отмечается), как у df.duplicated()
+
+    Строки сравниваются по 64-битному хэшу за один векторный проход.
+    При check_collisions каждая найденная пара дополнительно сверяется
+    по значениям, и строки с совпавшим хэшем, но разными данными остаются.
+    При return_hashes возвращается пара (маска, хэши строк).
+    """
+    hashes = row_hashes(df, subset)
+    duplicated = pd.Series(hashes).duplicated().to_numpy().copy()
+
+    if check_collisions and duplicated.any():
+        # Коды factorize нумеруются в порядке первого появления хэша,
+        # поэтому return_index даёт позицию первой строки с этим хэшем
+        codes, _ = pd.factorize(hashes)
+        first_rows = np.unique(codes, return_index=True)[1]
+        rows = np.flatnonzero(duplicated)
+        columns = df if subset is None else df[list(subset)]
+        collisions = rows[~_same_rows(columns, rows, first_rows[codes[rows]])]
+        duplicated[collisions] = False
+    return (duplicated, hashes) if return_hashes else duplicated
+
+
+def drop_duplicate_rows(df, subset=None, check_collisions=True, verbose=True):
+    """Удаление дубликатов строк с отчётом о числе удалённых"""
+    duplicated = duplicate_mask(df, subset, check_collisions)
+    dropped = int(duplicated.sum())
+    if verbose:
+        print(f"Удалено дубликатов: {dropped} из {len(df)} строк")
+    return df[~duplicated]
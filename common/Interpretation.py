@@ -0,0 +1,17 @@
+def correlation_strength(corr):
+    """Словесная оценка силы и направления корреляции"""
+    abs_corr = abs(corr)
+    if abs_corr >= 0.9:
+        strength = "очень сильная"
+    elif abs_corr >= 0.7:
+        strength = "сильная"
+    elif abs_corr >= 0.5:
+        strength = "умеренная"
+    elif abs_corr >= 0.3:
+        strength = "слабая"
+    else:
+        strength = "очень слабая или отсутствует"
+
+    direction = "положительная" if corr > 0 else "отрицательная"
+
+    return f"{strength} {direction}"
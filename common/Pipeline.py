@@ -0,0 +1,231 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from Dedup import duplicate_mask
+
+# Размер блока (в строках) для потокового выполнения
+CHUNK_SIZE = 200_000
+# Файлы не больше этого размера обрабатываются целиком в памяти
+EAGER_MAX_BYTES = 512 * 1024 ** 2
+
+
+def median_from_counts(counts):
+    """Точная медиана по накопленной таблице частот значений"""
+    counts = counts.sort_index()
+    total = int(counts.sum())
+    if total == 0:
+        return np.nan
+    cumulative = counts.to_numpy().cumsum()
+    values = counts.index.to_numpy()
+
+    def value_at(k):
+        return values[np.searchsorted(cumulative, k + 1)]
+
+    if total % 2:
+        return float(value_at(total // 2))
+    return (value_at(total // 2 - 1) + value_at(total // 2)) / 2
+
+
+# =============================================
+# Операции конвейера
+# =============================================
+
+class RowOp:
+    """Построчная операция без состояния: блок -> блок"""
+    barrier = False
+
+    def __init__(self, func, name):
+        self.func = func
+        self.name = name
+
+    def reset(self):
+        pass
+
+    def apply(self, df):
+        return self.func(df)
+
+
+class DropDuplicates:
+    """Удаление повторных строк (первое вхождение остаётся)
+
+    Внутри блока строки сверяются duplicate_mask, между блоками - по
+    отсортированному массиву хэшей уже встреченных строк. Новые хэши
+    вставляются в него на свои места (searchsorted + insert), без пересортировки.
+    """
+    barrier = False
+    name = 'drop_duplicates'
+
+    def __init__(self, subset=None):
+        self.subset = subset
+        self.reset()
+
+    def reset(self):
+        self.seen = np.empty(0, dtype=np.uint64)
+        self.rows = 0
+        self.removed = 0
+
+    def apply(self, df):
+        duplicated, hashes = duplicate_mask(df, self.subset, return_hashes=True)
+        keep = ~duplicated
+        if len(self.seen):
+            pos = np.minimum(np.searchsorted(self.seen, hashes), len(self.seen) - 1)
+            keep &= self.seen[pos] != hashes
+        new = np.unique(hashes[keep])
+        self.seen = np.insert(self.seen, np.searchsorted(self.seen, new), new)
+        self.rows += len(keep)
+        self.removed += len(keep) - int(keep.sum())
+        return df[keep]
+
+
+class FillMedian:
+    """Заполнение пропусков медианами столбцов
+
+    Барьер: медианы нужны по всем данным, поэтому в потоке перед применением
+    нужен отдельный проход, в котором накапливаются частоты значений.
+    """
+    barrier = True
+    name = 'fill_median'
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        self.medians = None
+        self.reset()
+
+    def reset(self):
+        self.counts = {col: pd.Series(dtype='int64') for col in self.columns}
+
+    def fit(self, df):
+        for col in self.columns:
+            self.counts[col] = self.counts[col].add(df[col].value_counts(), fill_value=0)
+
+    def fit_frame(self, df):
+        """Медианы по всему датафрейму сразу (выполнение в памяти)"""
+        self.medians = {col: df[col].median() for col in self.columns}
+
+    def finish(self):
+        self.medians = {col: median_from_counts(self.counts[col]) for col in self.columns}
+
+    def apply(self, df):
+        fill = {col: self.medians[col] for col in self.columns if df[col].isna().any()}
+        return df.fillna(fill) if fill else df
+
+
+# =============================================
+# Конвейер
+# =============================================
+
+class Pipeline:
+    """Декларативный конвейер очистки с отложенным выполнением
+
+    Методы добавления операций ничего не вычисляют и возвращают новый конвейер.
+    Данные читаются только в collect()/run(). Подряд идущие построчные операции
+    выполняются над одним блоком друг за другом, пока он в памяти; барьеры
+    (медианы) делят выполнение на проходы по источнику. Небольшие файлы
+    обрабатываются целиком в памяти, большие - блоками.
+    """
+
+    def __init__(self, path, reader=pd.read_csv, ops=()):
+        self.path = path
+        self.reader = reader
+        self.ops = list(ops)
+        self.rows_read = 0
+        self.rows_written = 0
+
+    @classmethod
+    def from_csv(cls, path, reader=pd.read_csv):
+        """reader(path) возвращает датафрейм, reader(path, chunksize=n) - итератор блоков"""
+        return cls(path, reader)
+
+    def _then(self, op):
+        return Pipeline(self.path, self.reader, self.ops + [op])
+
+    # Построчные операции
+    def map(self, func, name=None):
+        return self._then(RowOp(func, name or getattr(func, '__name__', 'map')))
+
+    def assign(self, **columns):
+        return self.map(lambda df: df.assign(**columns), 'assign ' + ', '.join(columns))
+
+    def astype(self, dtypes):
+        return self.map(lambda df: df.astype(dtypes), 'astype')
+
+    def filter(self, predicate, name='filter'):
+        return self.map(lambda df: df[predicate(df)], name)
+
+    # Операции с состоянием
+    def drop_duplicates(self, subset=None):
+        return self._then(DropDuplicates(subset))
+
+    def fill_median(self, columns):
+        return self._then(FillMedian(columns))
+
+    def op(self, name):
+        """Операция по имени (например, чтобы получить медианы или число удалённых строк)"""
+        return next(op for op in self.ops if op.name == name)
+
+    def describe(self):
+        """План выполнения: проходы по источнику и операции в каждом"""
+        passes, current = [], []
+        for op in self.ops:
+            current.append(op.name)
+            if op.barrier:
+                passes.append(current)
+                current = []
+        passes.append(current)
+        return passes
+
+    # Выполнение
+    def _streaming(self, chunksize):
+        if chunksize is not None:
+            return True
+        return os.path.getsize(self.path) > EAGER_MAX_BYTES
+
+    def _run_ops(self, df, ops):
+        for op in ops:
+            df = op.apply(df)
+        return df
+
+    def collect(self, chunksize=None):
+        """Результат целиком в памяти (для больших файлов - собирается из блоков)"""
+        if not self._streaming(chunksize):
+            df = self.reader(self.path)
+            self.rows_read = len(df)
+            for op in self.ops:
+                op.reset()
+                if op.barrier:
+                    op.fit_frame(df)
+                df = op.apply(df)
+            self.rows_written = len(df)
+            return df
+        return pd.concat(list(self.stream(chunksize)), ignore_index=True)
+
+    def stream(self, chunksize=None):
+        """Итератор очищенных блоков: по проходу на каждый барьер и финальный проход"""
+        chunksize = chunksize or CHUNK_SIZE
+        barriers = [i for i, op in enumerate(self.ops) if op.barrier]
+        for end in barriers:
+            barrier = self.ops[end]
+            for op in self.ops[:end + 1]:
+                op.reset()
+            for chunk in self.reader(self.path, chunksize=chunksize):
+                barrier.fit(self._run_ops(chunk, self.ops[:end]))
+            barrier.finish()
+
+        for op in self.ops:
+            op.reset()
+        self.rows_read = self.rows_written = 0
+        for chunk in self.reader(self.path, chunksize=chunksize):
+            self.rows_read += len(chunk)
+            chunk = self._run_ops(chunk, self.ops)
+            self.rows_written += len(chunk)
+            yield chunk
+
+    def run(self, sink, chunksize=None):
+        """Передача результата в sink(df) целиком или по блокам"""
+        if self._streaming(chunksize):
+            for chunk in self.stream(chunksize):
+                sink(chunk)
+        else:
+            sink(self.collect())
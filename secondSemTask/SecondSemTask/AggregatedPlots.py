@@ -0,0 +1,145 @@
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+
+from Approximate import stratified_sample_rows
+from SummaryCache import SummaryCache
+
+# С этого числа строк графики строятся по агрегатам, а не по исходным строкам
+AGGREGATE_MIN_ROWS = 100_000
+# Число интервалов гистограмм и точек KDE на графике
+BINS = 256
+# Размер сетки двумерной гистограммы для пар признаков
+GRID = 64
+# Наибольшая выборка для диаграмм рассеяния с цветом по группе
+SAMPLE_CAP = 5_000
+
+
+def should_aggregate(df, aggregate=None):
+    """aggregate=None - выбор по размеру данных"""
+    return len(df) >= AGGREGATE_MIN_ROWS if aggregate is None else aggregate
+
+
+# =============================================
+# Графики по сводкам SummaryCache: стоимость отрисовки зависит только от числа интервалов
+# =============================================
+
+def _box_stats(summary, label):
+    """Статистики для ax.bxp: квартили и усы по правилу 1.5 IQR, без выбросов"""
+    return dict(summary.box(), label=label, fliers=[])
+
+
+def _violin_stats(summary, bins=BINS):
+    """Статистики для ax.violin: KDE на сетке и квантили"""
+    coords, density = summary.kde(bins)
+    return {'coords': coords, 'vals': density / max(density.max(), 1e-12),
+            'mean': summary.mean, 'median': float(summary.quantile(0.5)),
+            'min': summary.min, 'max': summary.max}
+
+
+def hist_kde(ax, summary, bins=BINS, color='C0'):
+    """Гистограмма и KDE из сводки столбца (замена sns.histplot(kde=True))"""
+    counts, edges = summary.histogram(bins)
+    ax.stairs(counts, edges, fill=True, alpha=0.5, color=color)
+    centers, density = summary.kde(bins)
+    # Плотность в масштабе частот интервалов
+    ax.plot(centers, density * summary.n * (edges[1] - edges[0]), color=color)
+    ax.set_ylabel('Count')
+
+
+def count_bars(ax, series, top=None):
+    """Столбцы частот категорий (замена sns.countplot)"""
+    counts = series.value_counts()
+    counts = counts.nlargest(top) if top else counts.sort_index()
+    ax.bar(counts.index.astype(str), counts.to_numpy())
+    ax.set_ylabel('Count')
+
+
+def density_grid(ax, x, y, grid=GRID):
+    """Плотность пары признаков двумерной гистограммой (замена диаграммы рассеяния)"""
+    x_codes, x_edges = bin_codes(x, grid)
+    y_codes, y_edges = bin_codes(y, grid)
+    _draw_grid(ax, grid_counts(x_codes, y_codes, grid), x_edges, y_edges)
+
+
+def bin_codes(values, bins=GRID):
+    """Номера равных интервалов для значений (-1 - пропуск) и границы интервалов
+
+    Считаются один раз на столбец и подходят для любой пары с ним.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    known = ~np.isnan(values)
+    low, high = (values[known].min(), values[known].max()) if known.any() else (0.0, 1.0)
+    if high <= low:
+        high = low + 1
+    codes = np.full(len(values), -1, dtype=np.int64)
+    codes[known] = np.minimum(((values[known] - low) / (high - low) * bins).astype(np.int64), bins - 1)
+    return codes, np.linspace(low, high, bins + 1)
+
+
+def grid_counts(x_codes, y_codes, grid=GRID):
+    """Двумерная гистограмма по номерам интервалов: одна bincount вместо histogram2d"""
+    known = (x_codes >= 0) & (y_codes >= 0)
+    return np.bincount(x_codes[known] * grid + y_codes[known], minlength=grid * grid).reshape(grid, grid)
+
+
+def _draw_grid(ax, counts, x_edges, y_edges):
+    ax.pcolormesh(x_edges, y_edges, np.ma.masked_equal(counts.T, 0), cmap='viridis')
+
+
+def _known_groups(summaries):
+    """Сводки групп с наблюдениями; пустые группы пропускаются"""
+    return [(summary, label) for label, summary in summaries.items() if summary.n]
+
+
+def boxes(ax, summaries):
+    """Ящики с усами по квартилям сводок {подпись: ColumnSummary}"""
+    ax.bxp([_box_stats(summary, label) for summary, label in _known_groups(summaries)],
+           showmeans=False)
+
+
+def violins(ax, summaries):
+    """Скрипичные диаграммы по KDE и квантилям сводок {подпись: ColumnSummary}"""
+    stats = [(_violin_stats(summary), label) for summary, label in _known_groups(summaries)]
+    ax.violin([s for s, _ in stats], positions=np.arange(1, len(stats) + 1), showmedians=True)
+    ax.set_xticks(np.arange(1, len(stats) + 1), [str(label) for _, label in stats])
+
+
+def pairplot(df, cols, hue=None, grid=GRID, sample_cap=SAMPLE_CAP, summaries=None):
+    """Матрица пар признаков: на диагонали гистограммы, вне её - плотность
+
+    С hue вне диагонали рисуется стратифицированная по hue выборка не больше sample_cap строк.
+    """
+    cols = list(cols)
+    summaries = summaries or SummaryCache(df)
+    fig, axes = plt.subplots(len(cols), len(cols), figsize=(2.5 * len(cols), 2.5 * len(cols)),
+                             squeeze=False)
+    if hue is not None:
+        rows = stratified_sample_rows(df[hue], sample_cap, min_per_stratum=1)
+        sample = df.iloc[rows]
+        codes, labels = pd.factorize(sample[hue], sort=True)
+    else:
+        # Интервалы столбцов считаются один раз; сетка пары (j, i) - транспонированная (i, j)
+        binned = {col: bin_codes(df[col], grid) for col in cols}
+        grids = {}
+    for i, row_col in enumerate(cols):
+        for j, col in enumerate(cols):
+            ax = axes[i, j]
+            if i == j:
+                hist_kde(ax, summaries.column(col), bins=min(BINS, 64))
+            elif hue is None:
+                if (j, i) not in grids:
+                    grids[i, j] = grid_counts(binned[col][0], binned[row_col][0], grid)
+                counts = grids[i, j] if (i, j) in grids else grids[j, i].T
+                _draw_grid(ax, counts, binned[col][1], binned[row_col][1])
+            else:
+                ax.scatter(sample[col], sample[row_col], c=codes, cmap='tab10', s=4,
+                           vmin=0, vmax=9)
+            ax.set_xlabel(col if i == len(cols) - 1 else '')
+            ax.set_ylabel(row_col if j == 0 else '')
+    if hue is not None:
+        handles = [plt.Line2D([], [], marker='o', linestyle='', color=plt.get_cmap('tab10')(k))
+                   for k in range(len(labels))]
+        fig.legend(handles, [str(label) for label in labels], title=hue, loc='upper right')
+    return fig
+
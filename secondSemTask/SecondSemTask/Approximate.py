@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import scipy.stats as stats
+
+# Размер выборки по умолчанию для приближённого режима
+SAMPLE_SIZE = 50_000
+# Минимальное число строк от каждой группы в стратифицированной выборке
+MIN_PER_STRATUM = 30
+
+
+def sample_rows(n_rows, size, seed=0):
+    """Номера строк случайной выборки без возвращения
+
+    Каждой строке присваивается случайный приоритет, в выборку попадают строки
+    с наименьшими приоритетами - то же, что резервуарная выборка, но одной
+    векторной операцией.
+    """
+    if n_rows <= size:
+        return np.arange(n_rows)
+    keys = np.random.default_rng(seed).random(n_rows)
+    return np.sort(np.argpartition(keys, size)[:size])
+
+
+def stratified_sample_rows(strata, size, seed=0, min_per_stratum=MIN_PER_STRATUM):
+    """Номера строк стратифицированной выборки (резервуар на каждую группу)
+
+    Квота группы пропорциональна её размеру, но не меньше min_per_stratum,
+    чтобы редкие группы не выпадали из тестов. Строки с пропуском в strata
+    в выборку не входят.
+    """
+    codes, labels = pd.factorize(strata)
+    counts = np.bincount(codes[codes >= 0], minlength=len(labels))
+    quota = np.maximum(np.ceil(size * counts / max(counts.sum(), 1)), min_per_stratum)
+    quota = np.minimum(quota, counts).astype(np.int64)
+
+    keys = np.random.default_rng(seed).random(len(codes))
+    # Внутри группы строки упорядочены по приоритету, берутся первые quota
+    order = np.lexsort((keys, codes))
+    order = order[np.count_nonzero(codes < 0):]
+    sorted_codes = codes[order]
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    rank = np.arange(len(order)) - offsets[sorted_codes]
+    return np.sort(order[rank < quota[sorted_codes]])
+
+
+def fisher_interval(r, n, confidence=0.95, spearman=False):
+    """Доверительный интервал коэффициента корреляции через z-преобразование Фишера
+
+    Для Спирмена используется поправка дисперсии 1.06 / (n - 3) (Fieller и др.).
+    """
+    if n <= 3:
+        return -1.0, 1.0
+    se = np.sqrt((1.06 if spearman else 1.0) / (n - 3))
+    z = np.arctanh(np.clip(r, -0.999999, 0.999999))
+    margin = stats.norm.ppf(0.5 + confidence / 2) * se
+    return float(np.tanh(z - margin)), float(np.tanh(z + margin))
+
+
+# Во сколько раз p-value по выборке может отличаться от уровня значимости,
+# чтобы тест пересчитывался по всем данным
+THRESHOLD_FACTOR = 2.0
+
+
+def near_threshold(p, alpha=0.05, factor=THRESHOLD_FACTOR):
+    """p-value в узкой полосе вокруг уровня значимости - вывод по выборке ненадёжен
+
+    При нулевой гипотезе p-value распределено равномерно, поэтому полоса
+    [alpha / 2, alpha * 2] пересчитывает около 7.5% независимых пар, а не
+    половину, как полоса в порядок величины.
+    """
+    return alpha / factor <= p <= alpha * factor
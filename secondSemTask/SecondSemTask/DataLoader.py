@@ -0,0 +1,107 @@
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+# Очищенный датасет и каталог кэша разобранных данных
+CLEANED_CSV = 'auto-mpg-cleaned.csv'
+CACHE_DIR = '.data_cache'
+META_NAME = 'meta.json'
+
+
+def _file_hash(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _cache_path(path, cache_dir):
+    """Каталог кэша для файла: отдельный на каждый исходный путь"""
+    name = os.path.splitext(os.path.basename(path))[0]
+    key = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:12]
+    return os.path.join(cache_dir, f'{name}-{key}')
+
+
+def _read_meta(cache_path):
+    try:
+        with open(os.path.join(cache_path, META_NAME), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(cache_path, meta):
+    with open(os.path.join(cache_path, META_NAME), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+
+
+def _save_frame(df, cache_path, meta):
+    """Каждый столбец - отдельный .npy; строки хранятся как юникод фиксированной ширины"""
+    shutil.rmtree(cache_path, ignore_errors=True)
+    os.makedirs(cache_path)
+    columns = []
+    for i, col in enumerate(df.columns):
+        series = df[col]
+        if pd.api.types.is_numeric_dtype(series.dtype):
+            values = series.to_numpy()
+        else:
+            np.save(os.path.join(cache_path, f'{i}.na.npy'), series.isna().to_numpy())
+            values = series.fillna('').to_numpy().astype(str)
+        np.save(os.path.join(cache_path, f'{i}.npy'), values)
+        columns.append({'name': col, 'dtype': str(series.dtype),
+                        'numeric': bool(pd.api.types.is_numeric_dtype(series.dtype))})
+    _write_meta(cache_path, dict(meta, columns=columns))
+
+
+def _load_frame(cache_path, meta, mmap):
+    """Сборка датафрейма из .npy без копирования столбцов
+
+    При mmap числовые столбцы остаются отображёнными в память файлами
+    и доступны только для чтения.
+    """
+    data = {}
+    for i, column in enumerate(meta['columns']):
+        values = np.load(os.path.join(cache_path, f'{i}.npy'), mmap_mode='r' if mmap else None)
+        if column['numeric']:
+            data[column['name']] = values.view(np.ndarray)
+        else:
+            missing = np.load(os.path.join(cache_path, f'{i}.na.npy'))
+            data[column['name']] = pd.Series(values, dtype=object).mask(missing).astype(column['dtype'])
+    return pd.DataFrame(data, copy=False)
+
+
+def load_data(path=CLEANED_CSV, cache_dir=CACHE_DIR, mmap=False):
+    """Загрузка CSV через кэш разобранных данных
+
+    Кэш действителен, пока совпадают время изменения и размер файла; если они
+    изменились, сравнивается хеш содержимого, и CSV разбирается заново только
+    при реальном изменении данных. mmap=True - числовые столбцы читаются из
+    кэша по требованию и только для чтения (в том числе сразу после разбора CSV).
+    """
+    stat = os.stat(path)
+    cache_path = _cache_path(path, cache_dir)
+    meta = _read_meta(cache_path)
+
+    if meta and meta['mtime_ns'] == stat.st_mtime_ns and meta['size'] == stat.st_size:
+        return _load_frame(cache_path, meta, mmap)
+
+    file_hash = _file_hash(path)
+    if meta and meta['sha1'] == file_hash:
+        # Файл перезаписан без изменений: обновляется только отметка времени
+        meta.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+        _write_meta(cache_path, meta)
+        return _load_frame(cache_path, meta, mmap)
+
+    df = pd.read_csv(path)
+    meta = {'source': os.path.abspath(path), 'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size, 'sha1': file_hash}
+    _save_frame(df, cache_path, meta)
+    if mmap:
+        # Тот же доступ только для чтения, что и при попадании в кэш
+        return _load_frame(cache_path, _read_meta(cache_path), mmap)
+    return df
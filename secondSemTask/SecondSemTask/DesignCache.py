@@ -0,0 +1,44 @@
+import numpy as np
+from sklearn.preprocessing import PolynomialFeatures
+
+
+class DesignMatrixCache:
+    """Кэш полиномиальных матриц плана по (признаки, степень, часть выборки)
+
+    Матрицы хранятся как непрерывные массивы float64 со столбцом константы.
+    PolynomialFeatures упорядочивает члены по степени, поэтому матрица меньшей
+    степени - это первые столбцы уже посчитанной матрицы большей степени.
+    """
+
+    def __init__(self, splits):
+        # splits: {'train': DataFrame, 'test': DataFrame, ...}
+        self.splits = splits
+        self._matrices = {}
+
+    def get(self, features, degree, split):
+        """Матрица плана и имена её столбцов"""
+        key = (tuple(features), degree, split)
+        if key not in self._matrices:
+            self._matrices[key] = self._derive(*key) or self._expand(*key)
+        design, names, _ = self._matrices[key]
+        return design, names
+
+    def powers(self, features, degree, split='train'):
+        """Степени признаков в каждом столбце (как PolynomialFeatures.powers_)"""
+        self.get(features, degree, split)
+        return self._matrices[(tuple(features), degree, split)][2]
+
+    def _derive(self, features, degree, split):
+        """Матрица меньшей степени из уже посчитанной матрицы большей степени"""
+        for (cached_features, cached_degree, cached_split), (design, names, powers) in self._matrices.items():
+            if cached_features == features and cached_split == split and cached_degree > degree:
+                n_cols = np.count_nonzero(powers.sum(axis=1) <= degree)
+                return np.ascontiguousarray(design[:, :n_cols]), names[:n_cols], powers[:n_cols]
+        return None
+
+    def _expand(self, features, degree, split):
+        X = self.splits[split][list(features)].to_numpy(dtype=np.float64)
+        poly = PolynomialFeatures(degree=degree, include_bias=True)
+        design = np.ascontiguousarray(poly.fit_transform(X), dtype=np.float64)
+        names = ['const'] + list(poly.get_feature_names_out(features)[1:])
+        return design, names, poly.powers_
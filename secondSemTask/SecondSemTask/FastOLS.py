@@ -0,0 +1,117 @@
+import numpy as np
+from scipy.linalg import solve_triangular
+
+# Порог вырожденности: квадрат диагонали разложения относительно диагонали матрицы Грама
+RANK_TOLERANCE = 1e-10
+
+
+class FastOLS:
+    """МНК через разложение Холецкого кэшированной матрицы Грама
+
+    Матрица Грама [1, X] считается один раз. Набор признаков в модели меняется
+    методами add/remove: при добавлении признака разложение дополняется строкой,
+    при удалении восстанавливается вращениями Гивенса, без полного пересчёта.
+    Столбцы масштабируются к единичной диагонали матрицы Грама, чтобы степени
+    признаков разного порядка не портили обусловленность.
+    """
+
+    def __init__(self, X, y, names=None):
+        X = np.asarray(X, dtype=np.float64)
+        self.y = np.ascontiguousarray(y, dtype=np.float64)
+        self.design = np.column_stack([np.ones(len(X)), X])
+        self.names = ['const'] + list(names if names is not None else range(X.shape[1]))
+
+        gram = self.design.T @ self.design
+        self.scale = np.sqrt(np.diag(gram))
+        self.scale[self.scale == 0] = 1.0
+        self.gram = gram / np.outer(self.scale, self.scale)
+        self.xty = self.design.T @ self.y / self.scale
+        self.yty = self.y @ self.y
+        self.tss = self.yty - len(self.y) * self.y.mean() ** 2
+
+        # Признаки в модели (номера столбцов design) и верхнетреугольный R: R.T @ R = G[active, active]
+        self.active = []
+        self.R = np.zeros((0, 0))
+        self.add('const')
+
+    def _index(self, column):
+        return self.names.index(column) if not isinstance(column, (int, np.integer)) else int(column)
+
+    def add(self, column):
+        """Добавление признака: разложение дополняется одной строкой и столбцом"""
+        j = self._index(column)
+        if j in self.active:
+            return self
+        r = (solve_triangular(self.R, self.gram[self.active, j], trans='T', check_finite=False)
+             if self.active else np.zeros(0))
+        d2 = self.gram[j, j] - r @ r
+        if d2 <= RANK_TOLERANCE * self.gram[j, j]:
+            raise ValueError(f"Признак {self.names[j]} линейно зависим от уже включённых")
+
+        k = len(self.active)
+        R = np.zeros((k + 1, k + 1))
+        R[:k, :k] = self.R
+        R[:k, k] = r
+        R[k, k] = np.sqrt(d2)
+        self.R = R
+        self.active.append(j)
+        return self
+
+    def remove(self, column):
+        """Удаление признака: после вычёркивания столбца треугольность
+        восстанавливается вращениями Гивенса"""
+        j = self._index(column)
+        pos = self.active.index(j)
+        R = np.delete(self.R, pos, axis=1)
+        for i in range(pos, R.shape[1]):
+            a, b = R[i, i], R[i + 1, i]
+            h = np.hypot(a, b)
+            c, s = a / h, b / h
+            rows = R[[i, i + 1], i:]
+            R[i, i:] = c * rows[0] + s * rows[1]
+            R[i + 1, i:] = -s * rows[0] + c * rows[1]
+        self.R = R[:-1]
+        del self.active[pos]
+        return self
+
+    def select(self, columns):
+        """Модель ровно с заданными признаками (константа остаётся всегда)
+
+        Один лишний признак удаляется вращениями; при нескольких разложение
+        обрезается до первого лишнего (начальный блок R - разложение для
+        начала списка признаков), а нужные признаки после него добавляются заново.
+        """
+        wanted = [0] + [self._index(column) for column in columns]
+        wanted_set = set(wanted)
+        unwanted = [pos for pos, j in enumerate(self.active) if j not in wanted_set]
+        if len(unwanted) == 1:
+            self.remove(self.active[unwanted[0]])
+        elif unwanted:
+            self.R = self.R[:unwanted[0], :unwanted[0]]
+            self.active = self.active[:unwanted[0]]
+        for j in wanted:
+            self.add(j)
+        return self
+
+    def coefficients(self):
+        """Коэффициенты в исходном масштабе признаков, в порядке self.active"""
+        z = solve_triangular(self.R, self.xty[self.active], trans='T')
+        beta = solve_triangular(self.R, z)
+        return beta / self.scale[self.active]
+
+    def predict(self, X):
+        design = np.column_stack([np.ones(len(X)), np.asarray(X, dtype=np.float64)])
+        return design[:, self.active] @ self.coefficients()
+
+    def fit(self):
+        """Коэффициенты и метрики на обучающих данных без сводки statsmodels"""
+        beta = self.coefficients()
+        residuals = self.y - self.design[:, self.active] @ beta
+        rss = residuals @ residuals
+        return {
+            'features': [self.names[j] for j in self.active],
+            'coef': beta,
+            'r2': 1 - rss / self.tss,
+            'rmse': np.sqrt(rss / len(self.y)),
+            'mae': np.abs(residuals).mean(),
+        }
@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+import scipy.stats as stats
+import statsmodels.stats.multicomp as mc
+
+
+class CategoryGroups:
+    """Разбиение строк на группы по категориальному столбцу
+
+    Коды групп, порядок строк, сгруппированный по кодам, и границы групп
+    считаются один раз и подходят для любого числового столбца.
+    """
+
+    def __init__(self, categories):
+        codes, labels = pd.factorize(categories, sort=True)
+        self.labels = labels
+        self.codes = codes
+        order = np.argsort(codes, kind='stable')
+        # Строки с пропущенной категорией (код -1) в группы не входят
+        self.order = order[np.count_nonzero(codes < 0):]
+        self.counts = np.bincount(codes[codes >= 0], minlength=len(labels))
+        self.offsets = np.concatenate([[0], np.cumsum(self.counts)])
+
+    def __len__(self):
+        return len(self.labels)
+
+    def values(self, values):
+        """Значения числового столбца, разложенные по группам"""
+        return GroupedValues(self, np.asarray(values, dtype=np.float64))
+
+
+class GroupedValues:
+    """Значения по группам: срезы одного отсортированного массива и моменты групп"""
+
+    def __init__(self, groups, values):
+        self.groups = groups
+        self.values = values[groups.order]
+        # Срезы - представления одного массива, без копирования по группам
+        self.slices = [self.values[start:end]
+                       for start, end in zip(groups.offsets[:-1], groups.offsets[1:])]
+
+        known = groups.codes >= 0
+        codes = groups.codes[known]
+        n = groups.counts
+        sums = np.bincount(codes, weights=values[known], minlength=len(groups))
+        self.n = n
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self.mean = sums / n
+            # Суммы квадратов отклонений; дисперсия определена только для групп из 2+ строк
+            self.squares = np.bincount(codes, weights=(values[known] - self.mean[codes]) ** 2,
+                                       minlength=len(groups))
+            self.var = np.where(n > 1, self.squares / np.maximum(n - 1, 1), np.nan)
+
+    def f_oneway(self):
+        """Однофакторный ANOVA по моментам групп (как scipy.stats.f_oneway)"""
+        total = self.n.sum()
+        k = len(self.n)
+        grand_mean = (self.n * self.mean).sum() / total
+        between = (self.n * (self.mean - grand_mean) ** 2).sum() / (k - 1)
+        within = self.squares.sum() / (total - k)
+        f_stat = between / within
+        return f_stat, stats.f.sf(f_stat, k - 1, total - k)
+
+    def ttest_welch(self):
+        """t-тест Уэлча для двух групп по моментам"""
+        return stats.ttest_ind_from_stats(self.mean[0], np.sqrt(self.var[0]), self.n[0],
+                                          self.mean[1], np.sqrt(self.var[1]), self.n[1],
+                                          equal_var=False)
+
+    def kruskal(self):
+        return stats.kruskal(*self.slices)
+
+    def levene(self):
+        return stats.levene(*self.slices)
+
+    def tukey(self):
+        """Post-hoc тест Тьюки по уже сгруппированным значениям"""
+        labels = np.repeat(np.asarray(self.groups.labels), self.n)
+        return mc.pairwise_tukeyhsd(self.values, labels)
+
+
+class GroupedData:
+    """Кэш разбиений на группы и проверок нормальности для одного датафрейма"""
+
+    def __init__(self, df):
+        self.df = df
+        self._groups = {}
+        self._values = {}
+        self._normality = {}
+
+    def groups(self, cat_col):
+        if cat_col not in self._groups:
+            self._groups[cat_col] = CategoryGroups(self.df[cat_col])
+        return self._groups[cat_col]
+
+    def values(self, num_col, cat_col):
+        key = (num_col, cat_col)
+        if key not in self._values:
+            self._values[key] = self.groups(cat_col).values(self.df[num_col])
+        return self._values[key]
+
+    def _normality_test(self, test, col):
+        key = (test.__name__, col)
+        if key not in self._normality:
+            self._normality[key] = test(self.df[col])
+        return self._normality[key]
+
+    def normaltest(self, col):
+        """Тест Д'Агостино на нормальность (считается один раз на столбец)"""
+        return self._normality_test(stats.normaltest, col)
+
+    def shapiro(self, col):
+        """Тест Шапиро-Уилка на нормальность (считается один раз на столбец)"""
+        return self._normality_test(stats.shapiro, col)
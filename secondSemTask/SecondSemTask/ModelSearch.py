@@ -0,0 +1,124 @@
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import KFold
+
+from DataLoader import load_data
+from DesignCache import DesignMatrixCache
+from FastOLS import FastOLS
+
+# Состояние поиска в рабочем процессе (передаётся один раз через initializer)
+_search = None
+
+
+def candidate_models(features, max_degree=3, max_features=None):
+    """Все пары (подмножество признаков, степень полинома)"""
+    max_features = max_features or len(features)
+    return [(subset, degree)
+            for size in range(1, max_features + 1)
+            for subset in combinations(features, size)
+            for degree in range(1, max_degree + 1)]
+
+
+class ModelSearch:
+    """Перебор наборов признаков и степеней полинома с k-блочной кросс-валидацией
+
+    Признаки стандартизуются и один раз раскладываются до максимальной степени
+    (DesignMatrixCache); любая модель - это подмножество столбцов этого разложения.
+    Для обучающей части каждого блока держится одна модель FastOLS, и переход
+    к следующей модели - добавление и удаление столбцов в её разложении Холецкого.
+    Стандартизация - аффинная замена признаков, полиномы той же степени от неё
+    дают те же прогнозы, она нужна только для обусловленности.
+    """
+
+    def __init__(self, X, y, folds=5, max_degree=3, seed=42):
+        self.features = list(X.columns)
+        self.max_degree = max_degree
+        X = X.astype(np.float64)
+        # Постоянный признак только центрируется (деление на нулевое std дало бы NaN)
+        std = X.std(ddof=0)
+        X = (X - X.mean()) / std.where(std > 0, 1.0)
+        self.y = np.ascontiguousarray(y, dtype=np.float64)
+
+        design = DesignMatrixCache({'all': X})
+        expansion, names = design.get(self.features, max_degree, 'all')
+        self.powers = design.powers(self.features, max_degree, 'all')
+        self.degrees = self.powers.sum(axis=1)
+
+        # Модели FastOLS обучающих частей блоков (константу FastOLS добавляет сама)
+        self.folds = []
+        for train, test in KFold(n_splits=folds, shuffle=True, random_state=seed).split(X):
+            fast = FastOLS(expansion[train, 1:], self.y[train], names=names[1:])
+            self.folds.append((fast, expansion[test, 1:], self.y[test]))
+
+    def columns(self, subset, degree):
+        """Номера столбцов разложения для модели: только признаки subset и степень не выше degree"""
+        used = np.isin(self.features, subset)
+        mask = (self.degrees <= degree) & (self.powers[:, ~used].sum(axis=1) == 0)
+        return np.flatnonzero(mask)
+
+    def score(self, subset, degree):
+        """Метрики кросс-валидации для одной модели
+
+        Вырожденные модели (например, куб origin при трёх значениях origin)
+        возвращают None и в рейтинг не попадают.
+        """
+        cols = self.columns(subset, degree)
+        sse, abs_error, r2 = 0.0, 0.0, []
+        for fast, X_test, y_test in self.folds:
+            try:
+                fast.select(cols[1:])
+            except ValueError:
+                return None
+            residuals = y_test - fast.predict(X_test)
+            fold_sse = residuals @ residuals
+            sse += fold_sse
+            abs_error += np.abs(residuals).sum()
+            r2.append(1 - fold_sse / ((y_test - y_test.mean()) ** 2).sum())
+        return {'features': ', '.join(subset), 'degree': degree, 'terms': len(cols),
+                'cv_r2': np.mean(r2), 'cv_rmse': np.sqrt(sse / len(self.y)),
+                'cv_mae': abs_error / len(self.y)}
+
+    def run(self, candidates=None, workers=None, max_features=None):
+        """Рейтинг моделей по RMSE кросс-валидации; модели считаются в пуле процессов"""
+        if candidates is None:
+            candidates = candidate_models(self.features, self.max_degree, max_features)
+        if workers == 1:
+            results = [self.score(*candidate) for candidate in candidates]
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(self,)) as pool:
+                results = list(pool.map(_score_candidate, candidates, chunksize=16))
+
+        leaderboard = pd.DataFrame([result for result in results if result is not None])
+        return leaderboard.sort_values('cv_rmse', ignore_index=True)
+
+
+def _init_worker(search):
+    global _search
+    _search = search
+
+
+def _score_candidate(candidate):
+    return _search.score(*candidate)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Поиск регрессионной модели mpg по наборам признаков')
+    parser.add_argument('--max-degree', type=int, default=3)
+    parser.add_argument('--max-features', type=int, default=None)
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--top', type=int, default=20)
+    args = parser.parse_args()
+
+    # Данные только читаются, поэтому столбцы берутся из кэша без копирования
+    df = load_data(mmap=True)
+    features = [col for col in df.select_dtypes(include=['int64', 'float64']).columns if col != 'mpg']
+    search = ModelSearch(df[features], df['mpg'], folds=args.folds, max_degree=args.max_degree)
+    leaderboard = search.run(workers=args.workers, max_features=args.max_features)
+    print(f"Моделей оценено: {len(leaderboard)}")
+    print(leaderboard.head(args.top).to_string(float_format='{:.4f}'.format))
@@ -0,0 +1,81 @@
+import argparse
+import csv
+import sys
+
+# Модуль зависит только от numpy, чтобы сервис запускался быстро:
+# statsmodels, sklearn и pandas здесь не импортируются
+import numpy as np
+
+# Строк в одном блоке прогноза: ограничивает память под матрицу плана
+BLOCK_ROWS = 1_000_000
+
+
+def save_model(path, coef, powers, features, target='mpg'):
+    """Сохранение модели: коэффициенты, степени признаков в каждом члене и имена признаков"""
+    np.savez(path, coef=np.asarray(coef, dtype=np.float64), powers=np.asarray(powers, dtype=np.int8),
+             features=np.asarray(features, dtype=str), target=np.asarray(target, dtype=str))
+
+
+class MpgPredictor:
+    """Полиномиальная модель из файла .npz: прогноз одним матричным умножением на блок"""
+
+    def __init__(self, coef, powers, features, target='mpg'):
+        self.coef = np.ascontiguousarray(coef, dtype=np.float64)
+        self.powers = np.asarray(powers)
+        self.features = list(features)
+        self.target = target
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data['coef'], data['powers'], data['features'].tolist(), str(data['target']))
+
+    def design(self, X):
+        """Матрица плана (члены x строки): произведение степеней признаков для каждого члена
+
+        Члены хранятся по строкам, чтобы все умножения шли по непрерывной памяти.
+        """
+        X = np.ascontiguousarray(X.T)
+        # Степени каждого признака 0..max последовательными умножениями
+        tables = []
+        for j in range(len(X)):
+            table = np.empty((self.powers[:, j].max() + 1, X.shape[1]))
+            table[0] = 1.0
+            for k in range(1, len(table)):
+                np.multiply(table[k - 1], X[j], out=table[k])
+            tables.append(table)
+
+        design = np.ones((len(self.powers), X.shape[1]))
+        for term, powers in enumerate(self.powers):
+            for j in np.flatnonzero(powers):
+                design[term] *= tables[j][powers[j]]
+        return design
+
+    def predict(self, X):
+        """Прогноз для массива n x len(features) в порядке self.features
+        (или для объекта с доступом к столбцам по имени, например DataFrame)"""
+        if not isinstance(X, np.ndarray):
+            X = np.column_stack([np.asarray(X[name], dtype=np.float64) for name in self.features])
+        X = np.asarray(X, dtype=np.float64)
+        return np.concatenate([self.coef @ self.design(X[start:start + BLOCK_ROWS])
+                               for start in range(0, len(X), BLOCK_ROWS)] or [np.empty(0)])
+
+
+def _read_features(path, features):
+    """Нужные столбцы CSV как массив float64 без pandas"""
+    with open(path, newline='') as f:
+        header = next(csv.reader(f))
+    usecols = [header.index(name) for name in features]
+    return np.loadtxt(path, delimiter=',', skiprows=1, usecols=usecols, ndmin=2)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Прогноз mpg по сохранённой модели')
+    parser.add_argument('model', help='файл модели .npz')
+    parser.add_argument('data', help='CSV со столбцами признаков модели')
+    parser.add_argument('--output', help='файл для прогнозов (по умолчанию - стандартный вывод)')
+    args = parser.parse_args()
+
+    predictor = MpgPredictor.load(args.model)
+    predictions = predictor.predict(_read_features(args.data, predictor.features))
+    np.savetxt(args.output or sys.stdout, predictions, fmt='%.6f', header=predictor.target, comments='')
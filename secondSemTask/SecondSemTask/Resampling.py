@@ -0,0 +1,128 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Число повторных выборок по умолчанию
+N_RESAMPLES = 100_000
+# Примерный размер блока индексов (строк x наблюдений), чтобы блок помещался в кэш/память
+BLOCK_ELEMENTS = 4_000_000
+
+
+# =============================================
+# Статистики для блока повторных выборок: каждая функция получает данные,
+# генератор и размер блока и возвращает массив статистик длины size
+# =============================================
+
+def _standardize(x):
+    x = np.asarray(x, dtype=np.float64)
+    return (x - x.mean()) / (x.std() * np.sqrt(len(x)))
+
+
+def _permuted_correlations(data, rng, size):
+    """Корреляция Пирсона при случайных перестановках y (x и y стандартизованы)"""
+    x, y = data
+    idx = rng.permuted(np.broadcast_to(np.arange(len(y)), (size, len(y))), axis=1)
+    return y[idx] @ x
+
+
+def _bootstrap_correlations(data, rng, size):
+    """Корреляция Пирсона на бутстреп-выборках пар (x, y)"""
+    x, y = data
+    idx = rng.integers(0, len(x), size=(size, len(x)))
+    xb = x[idx]
+    yb = y[idx]
+    xb -= xb.mean(axis=1, keepdims=True)
+    yb -= yb.mean(axis=1, keepdims=True)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (xb * yb).sum(axis=1) / np.sqrt((xb ** 2).sum(axis=1) * (yb ** 2).sum(axis=1))
+
+
+def _permuted_between(data, rng, size):
+    """Сумма n_g * mean_g^2 при перестановке меток групп
+
+    При фиксированной общей сумме квадратов эта величина монотонна по F,
+    поэтому перестановочный p-value для неё совпадает с p-value для F.
+    """
+    values, offsets = data
+    idx = rng.permuted(np.broadcast_to(np.arange(len(values)), (size, len(values))), axis=1)
+    sums = np.add.reduceat(values[idx], offsets[:-1], axis=1)
+    return (sums ** 2 / np.diff(offsets)).sum(axis=1)
+
+
+def _bootstrap_group_means(data, rng, size):
+    """Средние групп на бутстреп-выборках внутри каждой группы (size x число групп)"""
+    values, offsets = data
+    means = []
+    for start, end in zip(offsets[:-1], offsets[1:]):
+        idx = rng.integers(start, end, size=(size, end - start))
+        means.append(values[idx].mean(axis=1))
+    return np.column_stack(means)
+
+
+# =============================================
+# Движок: блоки индексов, воспроизводимые генераторы, пул процессов
+# =============================================
+
+def _run_block(task):
+    statistic, data, size, seed = task
+    return statistic(data, np.random.default_rng(seed), size)
+
+
+def resample(statistic, data, n_observations, n_resamples=N_RESAMPLES, seed=0, workers=None):
+    """Статистики для n_resamples повторных выборок, посчитанные блоками
+
+    Каждый блок получает свой генератор из SeedSequence(seed).spawn, поэтому
+    результат не зависит от числа процессов. workers=None или 1 - без пула.
+    """
+    block = max(1, BLOCK_ELEMENTS // max(n_observations, 1))
+    sizes = [min(block, n_resamples - start) for start in range(0, n_resamples, block)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(statistic, data, size, child) for size, child in zip(sizes, seeds)]
+
+    if workers and workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return np.concatenate(list(pool.map(_run_block, tasks)))
+    return np.concatenate([_run_block(task) for task in tasks])
+
+
+def _p_value(extreme):
+    """p-value по доле выборок не менее экстремальных, чем наблюдаемая (с поправкой +1)"""
+    return (np.count_nonzero(extreme) + 1) / (len(extreme) + 1)
+
+
+def correlation_tests(x, y, n_resamples=N_RESAMPLES, seed=0, workers=None, confidence=0.95):
+    """Перестановочный тест и бутстреп-интервал для корреляции Пирсона"""
+    xs, ys = _standardize(x), _standardize(y)
+    r = float(xs @ ys)
+    permuted = resample(_permuted_correlations, (xs, ys), len(xs), n_resamples, seed, workers)
+    raw = (np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64))
+    boot = resample(_bootstrap_correlations, raw, len(xs), n_resamples, seed + 1, workers)
+    tail = (1 - confidence) / 2
+    return {'r': r, 'p': _p_value(np.abs(permuted) >= abs(r) - 1e-12),
+            'ci': tuple(np.nanquantile(boot, [tail, 1 - tail])), 'n_resamples': n_resamples}
+
+
+def group_tests(values, labels, n_resamples=N_RESAMPLES, seed=0, workers=None, confidence=0.95):
+    """Перестановочный тест различия средних групп и бутстреп-интервалы средних"""
+    codes, names = pd.factorize(labels, sort=True)
+    # Строки без метки группы (код -1) в тест не входят
+    known = codes >= 0
+    codes = codes[known]
+    order = np.argsort(codes, kind='stable')
+    values = np.asarray(values, dtype=np.float64)[known][order]
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=len(names)))])
+    data = (values, offsets)
+
+    observed = (np.add.reduceat(values, offsets[:-1]) ** 2 / np.diff(offsets)).sum()
+    permuted = resample(_permuted_between, data, len(values), n_resamples, seed, workers)
+    boot = resample(_bootstrap_group_means, data, len(values), n_resamples, seed + 1, workers)
+
+    tail = (1 - confidence) / 2
+    means = pd.DataFrame({
+        'mean': np.add.reduceat(values, offsets[:-1]) / np.diff(offsets),
+        'ci_low': np.quantile(boot, tail, axis=0),
+        'ci_high': np.quantile(boot, 1 - tail, axis=0),
+    }, index=pd.Index(names, name='group'))
+    return {'p': _p_value(permuted >= observed * (1 - 1e-12)), 'means': means,
+            'n_resamples': n_resamples}
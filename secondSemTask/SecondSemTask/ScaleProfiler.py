@@ -0,0 +1,154 @@
+import hashlib
+import json
+import os
+import re
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'common'))
+from Dedup import row_hashes
+from DataLoader import CACHE_DIR
+
+# Каталог сохранённых профилей шкал: по файлу на датасет (имя - по отпечатку данных)
+PROFILE_DIR = CACHE_DIR
+# До этого числа строк различные значения считаются точно, дальше - оценкой KMV
+EXACT_MAX_ROWS = 1_000_000
+# Число минимальных хэшей в оценке KMV (относительная ошибка около 1 / sqrt(k))
+KMV_K = 4096
+# Целые столбцы с таким или меньшим числом значений считаются дискретными шкалами
+DISCRETE_MAX_DISTINCT = 12
+# Слова имён (части между '_' и пробелами), по которым шкала определяется без анализа значений
+INTERVAL_NAME_HINTS = ('year', 'date', 'month', 'temp', 'temperature')
+NOMINAL_NAME_HINTS = ('origin', 'region', 'country', 'code', 'id', 'type', 'gender')
+
+SCALE_NAMES = {
+    'nominal': 'Номинальная (nominal)',
+    'ordinal': 'Порядковая (ordinal)',
+    'interval': 'Интервальная (interval)',
+    'ratio': 'Относительная (ratio)',
+}
+
+
+def kmv_distinct(values, k=KMV_K, chunksize=1_000_000):
+    """Оценка числа различных значений по k минимальным 64-битным хэшам (KMV)
+
+    Хэши обрабатываются блоками; после заполнения эскиза в следующий блок
+    попадают только хэши меньше текущего k-го, поэтому почти все отбрасываются сразу.
+    """
+    hashes = pd.util.hash_pandas_object(pd.Series(values).dropna(), index=False).to_numpy()
+    sketch = np.empty(0, dtype=np.uint64)
+    for start in range(0, len(hashes), chunksize):
+        block = hashes[start:start + chunksize]
+        if len(sketch) == k:
+            block = block[block < sketch[-1]]
+        sketch = np.unique(np.concatenate([sketch, block]))[:k]
+    if len(sketch) < k:
+        return len(sketch)
+    return int(round((k - 1) / ((float(sketch[-1]) + 1) / 2.0 ** 64)))
+
+
+def _name_has(col, hints):
+    """В имени есть одно из слов hints (подстроки не считаются: 'id' не совпадает с 'width')"""
+    return not set(re.split(r'[_\s]+', str(col).lower())).isdisjoint(hints)
+
+
+def infer_scale(col, series, distinct):
+    """Шкала измерения по имени, типу и значениям столбца"""
+    if not pd.api.types.is_numeric_dtype(series.dtype) or pd.api.types.is_bool_dtype(series.dtype):
+        return 'nominal'
+    if _name_has(col, INTERVAL_NAME_HINTS):
+        return 'interval'
+
+    values = series.dropna()
+    integer = pd.api.types.is_integer_dtype(series.dtype) or bool((values == values.round()).all())
+    if integer and distinct <= DISCRETE_MAX_DISTINCT:
+        low, high = values.min(), values.max()
+        # Подряд идущие коды 0..n или 1..n - метки категорий, а не величины
+        if _name_has(col, NOMINAL_NAME_HINTS) or (low in (0, 1) and high - low + 1 == distinct):
+            return 'nominal'
+        return 'ordinal'
+    # Отрицательные значения - нуль шкалы условный
+    return 'ratio' if len(values) == 0 or values.min() >= 0 else 'interval'
+
+
+def _fingerprint(df):
+    """Отпечаток датафрейма: столбцы, типы и хэши всех строк"""
+    digest = hashlib.sha1(json.dumps([[str(col), str(dtype)] for col, dtype in df.dtypes.items()]).encode())
+    digest.update(str(len(df)).encode())
+    digest.update(row_hashes(df).tobytes())
+    return digest.hexdigest()
+
+
+def profile_path(fingerprint, profile_dir=PROFILE_DIR):
+    """Файл профиля датасета с данным отпечатком"""
+    return os.path.join(profile_dir, f'scale_profile-{fingerprint[:16]}.json')
+
+
+class ScaleProfile:
+    """Профиль датасета: число различных значений и шкала каждого столбца"""
+
+    def __init__(self, columns, fingerprint=None):
+        self.columns = columns
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def build(cls, df, fingerprint=None):
+        """Один проход по столбцам датафрейма (fingerprint - уже посчитанный отпечаток df)"""
+        columns = {}
+        approximate = len(df) > EXACT_MAX_ROWS
+        for col in df.columns:
+            series = df[col]
+            distinct = kmv_distinct(series) if approximate else int(series.nunique())
+            columns[col] = {'dtype': str(series.dtype), 'distinct': distinct,
+                            'approximate': approximate, 'scale': infer_scale(col, series, distinct)}
+        return cls(columns, fingerprint or _fingerprint(df))
+
+    @classmethod
+    def for_frame(cls, df, profile_dir=PROFILE_DIR):
+        """Профиль из файла, если он построен для этих данных, иначе новый (и сохраняется)
+
+        У каждого датасета свой файл, поэтому профили исходных и очищенных
+        данных не перезаписывают друг друга. profile_dir=None - без сохранения.
+        """
+        fingerprint = _fingerprint(df)
+        path = profile_path(fingerprint, profile_dir) if profile_dir else None
+        if path and os.path.exists(path):
+            profile = cls.load(path)
+            if profile.fingerprint == fingerprint:
+                return profile
+        profile = cls.build(df, fingerprint)
+        if path:
+            profile.save(path)
+        return profile
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data['columns'], data['fingerprint'])
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'fingerprint': self.fingerprint, 'columns': self.columns}, f,
+                      ensure_ascii=False, indent=2)
+
+    @property
+    def scale_types(self):
+        return {col: info['scale'] for col, info in self.columns.items()}
+
+    def scale(self, col):
+        return self.columns[col]['scale'] if col in self.columns else 'unknown'
+
+    def distinct(self, col):
+        return self.columns[col]['distinct']
+
+
+if __name__ == '__main__':
+    from DataLoader import load_data
+
+    profile = ScaleProfile.for_frame(load_data())
+    for col, info in profile.columns.items():
+        print(f"{col}: {SCALE_NAMES[info['scale']]}, различных значений: {info['distinct']}")
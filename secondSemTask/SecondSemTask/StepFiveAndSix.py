@@ -1,19 +1,27 @@
+import os
+import sys
+
 import pandas as pd
 import numpy as np
 import scipy.stats as stats
-from scipy.stats import f_oneway, pearsonr, spearmanr, shapiro, levene, kruskal
+from scipy.stats import pearsonr, spearmanr
 import statsmodels.api as sm
 from statsmodels.formula.api import ols
-import statsmodels.stats.multicomp as mc
 import matplotlib.pyplot as plt
 import seaborn as sns
 from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
-from sklearn.preprocessing import PolynomialFeatures
 from sklearn.linear_model import LinearRegression
 from sklearn.model_selection import train_test_split
 
-# Загрузка данных
-df = pd.read_csv('auto-mpg-cleaned.csv')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'common'))
+from Interpretation import correlation_strength
+from GroupedData import GroupedData
+from FastOLS import FastOLS
+from DesignCache import DesignMatrixCache
+from MpgPredictor import save_model
+from Resampling import N_RESAMPLES, correlation_tests, group_tests
+from ModelSearch import ModelSearch
+from DataLoader import load_data
 
 
 # =============================================
@@ -21,8 +29,12 @@ df = pd.read_csv('auto-mpg-cleaned.csv')
 # =============================================
 
 class HypothesisTester:
-    def __init__(self, df):
+    def __init__(self, df, n_resamples=N_RESAMPLES, seed=0, workers=None):
         self.df = df
+        # Параметры перестановочных и бутстреп-проверок
+        self.n_resamples = n_resamples
+        self.seed = seed
+        self.workers = workers
 
     def test_hypothesis_1(self):
         """Гипотеза о связи мощности двигателя и расхода топлива"""
@@ -53,15 +65,22 @@ class HypothesisTester:
         pearson_corr, pearson_p = pearsonr(self.df['horsepower'], self.df['mpg'])
         spearman_corr, spearman_p = spearmanr(self.df['horsepower'], self.df['mpg'])
 
+        # Проверка без предположения о нормальности: перестановки и бутстреп
+        resampled = correlation_tests(self.df['horsepower'], self.df['mpg'],
+                                      self.n_resamples, self.seed, self.workers)
+
         print("Результаты:")
         print(f"Корреляция Пирсона: r={pearson_corr:.3f}, p={pearson_p:.3e}")
         print(f"Корреляция Спирмена: ρ={spearman_corr:.3f}, p={spearman_p:.3e}")
+        print(f"Перестановочный тест ({resampled['n_resamples']} перестановок): p={resampled['p']:.3e}")
+        print("Бутстреп 95% доверительный интервал r: [{:.3f}, {:.3f}]".format(*resampled['ci']))
 
         # 5. Вывод
         print("\nВывод:")
         if pearson_p < 0.05 and spearman_p < 0.05:
             print("Отвергаем H0: существует статистически значимая отрицательная корреляция")
-            print("Сила связи: умеренная (коэффициенты около -0.8)")
+            strength = correlation_strength(pearson_corr)
+            print(f"Сила связи: {strength} (r={pearson_corr:.2f}, ρ={spearman_corr:.2f})")
         else:
             print("Нет оснований отвергать H0")
         print("\n" + "-" * 50)
@@ -83,27 +102,38 @@ class HypothesisTester:
         plt.show()
 
         # 3. Проверка условий
+        # Группы строятся один раз и используются всеми тестами ниже
+        grouped = GroupedData(self.df)
+        groups = grouped.values('mpg', 'origin')
+
         # Проверка нормальности
-        _, p_shapiro = shapiro(self.df['mpg'])
+        _, p_shapiro = grouped.shapiro('mpg')
         print(f"Тест Шапиро-Уилка на нормальность: p={p_shapiro:.3f}")
 
         # Проверка гомогенности дисперсий
-        groups = [group[1]['mpg'].values for group in self.df.groupby('origin')]
-        _, p_levene = levene(*groups)
+        _, p_levene = groups.levene()
         print(f"Тест Левена на гомогенность: p={p_levene:.3f}")
 
         # 4. Выбор критерия
         if p_shapiro > 0.05 and p_levene > 0.05:
             print("\nИспользуем ANOVA (условия выполнены)")
             test_name = "ANOVA"
-            f_stat, p_value = f_oneway(*groups)
+            f_stat, p_value = groups.f_oneway()
             print(f"F={f_stat:.3f}, p={p_value:.3e}")
         else:
             print("\nИспользуем тест Краскела-Уоллиса (условия не выполнены)")
             test_name = "Краскела-Уоллиса"
-            h_stat, p_value = kruskal(*groups)
+            h_stat, p_value = groups.kruskal()
             print(f"H={h_stat:.3f}, p={p_value:.3e}")
 
+        # Проверка без предположений о распределении: перестановки меток и бутстреп средних
+        resampled = group_tests(self.df['mpg'], self.df['origin'],
+                                self.n_resamples, self.seed, self.workers)
+        print(f"\nПерестановочный тест ({resampled['n_resamples']} перестановок): "
+              f"p={resampled['p']:.3e}")
+        print("Средние по регионам с бутстреп 95% доверительными интервалами:")
+        print(resampled['means'].round(3))
+
         # 5. Вывод
         print("\nВывод:")
         if p_value < 0.05:
@@ -111,7 +141,7 @@ class HypothesisTester:
 
             # Post-hoc анализ
             print("\nPost-hoc тест Тьюки:")
-            tukey = mc.pairwise_tukeyhsd(self.df['mpg'], self.df['origin'])
+            tukey = groups.tukey()
             print(tukey)
         else:
             print("Нет оснований отвергать H0")
@@ -126,6 +156,8 @@ class RegressionModeler:
     def __init__(self, df, target='mpg'):
         self.df = df
         self.target = target
+        # Быстрые модели по степени полинома (FastOLS по разложению всех признаков)
+        self._fast_models = {}
         self._prepare_data()
 
     def _prepare_data(self):
@@ -139,70 +171,80 @@ class RegressionModeler:
         y = self.df[self.target]
         self.X_train, self.X_test, self.y_train, self.y_test = train_test_split(
             X, y, test_size=0.2, random_state=42)
+        # Полиномиальные признаки считаются один раз на (признаки, степень, часть выборки)
+        self.design = DesignMatrixCache({'train': self.X_train, 'test': self.X_test})
 
-    def build_polynomial_model(self, features=['horsepower', 'weight'], degree=2):
-        """Построение полиномиальной модели"""
-        print(f"\n=== Полиномиальная регрессия (степень {degree}) ===")
-
-        # Создание полиномиальных признаков
-        poly = PolynomialFeatures(degree=degree, include_bias=False)
-        X_train_poly = poly.fit_transform(self.X_train[features])
-        X_test_poly = poly.transform(self.X_test[features])
-
-        # Получение имен признаков
-        feature_names = poly.get_feature_names_out(features)
-
-        # Создание DataFrame с правильными индексами
-        X_train_poly = pd.DataFrame(X_train_poly, columns=feature_names, index=self.X_train.index)
-        X_test_poly = pd.DataFrame(X_test_poly, columns=feature_names, index=self.X_test.index)
-
-        # Добавление константы
-        X_train_poly = sm.add_constant(X_train_poly)
-        X_test_poly = sm.add_constant(X_test_poly)
-
-        # Обучение модели
-        model = sm.OLS(self.y_train, X_train_poly).fit()
-
-        # Прогнозирование
-        y_pred = model.predict(X_test_poly)
-
-        # Оценка
-        self._evaluate_model(model, y_pred)
-        self._plot_results(y_pred, f"Полиномиальная (степень {degree})")
-
-        return model
+    def build_linear_model(self, features=['horsepower', 'weight', 'acceleration']):
+        """Построение линейной модели"""
+        return self.build_polynomial_model(features=features, degree=1)
 
     def build_polynomial_model(self, features=['horsepower', 'weight'], degree=2):
         """Построение полиномиальной модели"""
-        print(f"\n=== Полиномиальная регрессия (степень {degree}) ===")
-
-        # Создание полиномиальных признаков
-        poly = PolynomialFeatures(degree=degree, include_bias=False)
-        X_train_poly = poly.fit_transform(self.X_train[features])
-        X_test_poly = poly.transform(self.X_test[features])
-
-        # Получение имен признаков
-        feature_names = poly.get_feature_names_out(features)
-        X_train_poly = pd.DataFrame(X_train_poly, columns=feature_names)
-        X_test_poly = pd.DataFrame(X_test_poly, columns=feature_names)
+        if degree == 1:
+            print("\n=== Линейная регрессия ===")
+        else:
+            print(f"\n=== Полиномиальная регрессия (степень {degree}) ===")
 
-        # Добавление константы
-        X_train_poly = sm.add_constant(X_train_poly)
-        X_test_poly = sm.add_constant(X_test_poly)
+        # Матрицы плана с константой берутся из кэша (без DataFrame и sm.add_constant)
+        X_train_poly, feature_names = self.design.get(features, degree, 'train')
+        X_test_poly, _ = self.design.get(features, degree, 'test')
 
         # Обучение модели
-        model = sm.OLS(self.y_train, X_train_poly).fit()
+        model = sm.OLS(self.y_train.to_numpy(dtype=np.float64), X_train_poly).fit()
+        # Рецепт признаков нужен для прогнозов в compare_models
+        model.design_spec = (tuple(features), degree)
 
         # Прогнозирование
         y_pred = model.predict(X_test_poly)
 
         # Оценка
-        self._evaluate_model(model, y_pred)
-        self._plot_results(y_pred, f"Полиномиальная (степень {degree})")
+        self._evaluate_model(model, y_pred, feature_names)
+        self._plot_results(y_pred, "Линейная" if degree == 1 else f"Полиномиальная (степень {degree})")
 
         return model
 
-    def _evaluate_model(self, model, y_pred):
+    def fast_fit(self, features=['horsepower', 'weight'], degree=1):
+        """Быстрая подгонка МНК без statsmodels: коэффициенты и метрики на тестовой выборке
+
+        Для поиска моделей по многим наборам признаков: без сводки, графиков и DataFrame.
+        """
+        fast = self._fast_model(degree)
+        # Члены разложения всех признаков, в которые входят только признаки модели;
+        # переход от прошлого набора - добавление и удаление столбцов в разложении
+        powers = self.design.powers(self.features, degree)
+        unused = ~np.isin(self.features, features)
+        fast.select(np.flatnonzero(powers[:, unused].sum(axis=1) == 0)[1:])
+
+        y_test = self.y_test.to_numpy(dtype=np.float64)
+        y_pred = fast.predict(self.design.get(self.features, degree, 'test')[0][:, 1:])
+        residuals = y_test - y_pred
+        return {
+            'coef': pd.Series(fast.coefficients(), index=[fast.names[j] for j in fast.active]
+                              ).iloc[np.argsort(fast.active)],
+            'r2': 1 - (residuals @ residuals) / ((y_test - y_test.mean()) ** 2).sum(),
+            'rmse': np.sqrt((residuals ** 2).mean()),
+            'mae': np.abs(residuals).mean(),
+        }
+
+    def _fast_model(self, degree):
+        """Одна модель FastOLS на степень: матрица Грама разложения всех признаков считается один раз"""
+        if degree not in self._fast_models:
+            X_train, names = self.design.get(self.features, degree, 'train')
+            # Столбец константы FastOLS добавляет сам
+            self._fast_models[degree] = FastOLS(X_train[:, 1:], self.y_train.to_numpy(), names=names[1:])
+        return self._fast_models[degree]
+
+    def search_models(self, max_degree=3, folds=5, workers=None, max_features=None):
+        """Рейтинг моделей по всем наборам признаков и степеням (кросс-валидация на train)"""
+        search = ModelSearch(self.X_train, self.y_train, folds=folds, max_degree=max_degree)
+        return search.run(workers=workers, max_features=max_features)
+
+    def save_model(self, model, path):
+        """Сохранение модели из build_polynomial_model для MpgPredictor"""
+        features, degree = model.design_spec
+        save_model(path, model.params, self.design.powers(features, degree), features, self.target)
+
+    def _evaluate_model(self, model, y_pred, feature_names):
         """Оценка качества модели"""
         # Метрики
         mse = mean_squared_error(self.y_test, y_pred)
@@ -211,7 +253,7 @@ class RegressionModeler:
         r2 = r2_score(self.y_test, y_pred)
 
         # Вывод результатов
-        print(model.summary())
+        print(model.summary(yname=self.target, xname=list(feature_names)))
         print("\nМетрики качества:")
         print(f"MSE: {mse:.4f}")
         print(f"RMSE: {rmse:.4f}")
@@ -243,8 +285,8 @@ class RegressionModeler:
         print("\n=== Сравнение моделей ===")
 
         # Прогнозы
-        y_pred1 = model1.predict(sm.add_constant(self.X_test))
-        y_pred2 = model2.predict(sm.add_constant(self.X_test))
+        y_pred1 = model1.predict(self.design.get(*model1.design_spec, 'test')[0])
+        y_pred2 = model2.predict(self.design.get(*model2.design_spec, 'test')[0])
 
         # Метрики
         metrics = {
@@ -273,8 +315,8 @@ class RegressionModeler:
 # =============================================
 
 if __name__ == "__main__":
-    # Загрузка данных
-    df = pd.read_csv('auto-mpg-cleaned.csv')
+    # Загрузка данных (CSV разбирается один раз, дальше - из кэша)
+    df = load_data()
 
     # Шаг 5: Проверка гипотез
     tester = HypothesisTester(df)
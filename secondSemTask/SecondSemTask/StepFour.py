@@ -1,69 +1,363 @@
+import argparse
+import contextlib
+import hashlib
+import os
+import pickle
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 import pandas as pd
 import scipy.stats as stats
-from scipy.stats import f_oneway, kruskal, chi2_contingency
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'common'))
+from BatchRender import ScreenRenderer, call_method, render_batch, render_pool
+from Contingency import ContingencyBuilder
+from Dedup import row_hashes
+from Interpretation import correlation_strength
+from Approximate import SAMPLE_SIZE, fisher_interval, near_threshold, sample_rows, stratified_sample_rows
+from GroupedData import GroupedData
+from DataLoader import CACHE_DIR, load_data
+from ScaleProfiler import ScaleProfile
+from SummaryCache import SummaryCache
+import AggregatedPlots
+
+# Файл кэша результатов тестов по умолчанию (в каталоге кэша рядом с данными)
+CACHE_PATH = os.path.join(CACHE_DIR, 'relationship_cache.pkl')
+# Наибольшее число категорий, для которого строится тепловая карта
+HEATMAP_MAX_CATEGORIES = 10
+
+
+# =============================================
+# Статистические тесты для пары столбцов (без графиков и вывода)
+# =============================================
+
+def numeric_numeric_test(df, col1, col2, grouped=None):
+    """Корреляции Пирсона и Спирмена"""
+    pearson_corr, pearson_p = stats.pearsonr(df[col1], df[col2])
+    spearman_corr, spearman_p = stats.spearmanr(df[col1], df[col2])
+    return {'test': 'корреляция Пирсона', 'stat': pearson_corr, 'p': pearson_p,
+            'pearson': pearson_corr, 'pearson_p': pearson_p,
+            'spearman': spearman_corr, 'spearman_p': spearman_p}
+
+
+def numeric_categorical_test(df, num_col, cat_col, grouped=None):
+    """t-тест Уэлча, ANOVA или Краскела-Уоллиса в зависимости от числа групп и нормальности"""
+    # Разбиение на группы и проверка нормальности переиспользуются между парами
+    grouped = grouped or GroupedData(df)
+    groups = grouped.values(num_col, cat_col)
+
+    if len(groups.n) == 2:
+        # t-тест для двух групп
+        stat, p = groups.ttest_welch()
+        test_name = "t-тест (Уэлча)"
+    else:
+        # ANOVA или Краскела-Уоллиса для нескольких групп
+        if grouped.normaltest(num_col).pvalue > 0.05:
+            stat, p = groups.f_oneway()
+            test_name = "ANOVA"
+        else:
+            stat, p = groups.kruskal()
+            test_name = "Краскела-Уоллиса"
+    return {'test': test_name, 'stat': stat, 'p': p}
+
+
+def _contingency_result(builder):
+    """Результат хи-квадрат по накопленной таблице; плотная таблица - только для небольших"""
+    result = builder.chi_square()
+    n_rows, n_cols = result['shape']
+    table = None
+    if max(n_rows, n_cols) <= HEATMAP_MAX_CATEGORIES:
+        table = builder.to_frame().sort_index().sort_index(axis=1)
+    return {'test': 'хи-квадрат', 'stat': result['chi2'], 'p': result['p'], 'dof': result['dof'],
+            'cramers_v': result['cramers_v'], 'shape': result['shape'], 'table': table}
+
+
+def categorical_categorical_test(df, col1, col2, grouped=None):
+    """Хи-квадрат и V Крамера по разреженной таблице сопряженности"""
+    return _contingency_result(ContingencyBuilder.from_frame(df, col1, col2))
+
+
+def categorical_file_test(path, col1, col2, chunksize=None):
+    """Хи-квадрат для столбцов CSV/Parquet, читаемых блоками (данные не помещаются в память)"""
+    kwargs = {'chunksize': chunksize} if chunksize else {}
+    return _contingency_result(ContingencyBuilder.from_file(path, col1, col2, **kwargs))
+
+
+def report_contingency(col1, col2, result, renderer):
+    """Вывод таблицы сопряженности и результатов хи-квадрат"""
+    contingency_table = result['table']
+    if contingency_table is not None:
+        print("\nТаблица сопряженности:")
+        print(contingency_table)
+
+        # Визуализация - тепловая карта
+        plt.figure(figsize=(10, 6))
+        sns.heatmap(contingency_table, annot=True, fmt='d', cmap='Blues')
+        plt.title(f"Связь между {col1} и {col2}")
+        renderer.show()
+    else:
+        n_rows, n_cols = result['shape']
+        print(f"\nТаблица сопряженности {n_rows} x {n_cols} слишком велика для вывода")
+
+    # Хи-квадрат тест
+    chi2, p, dof = result['stat'], result['p'], result['dof']
+
+    print("\nРезультаты теста хи-квадрат:")
+    print(f"Хи-квадрат: {chi2:.3f}, p-value: {p:.3f}, степени свободы: {dof}, "
+          f"V Крамера: {result['cramers_v']:.3f}")
+
+    # Интерпретация
+    if p < 0.05:
+        print("Есть статистически значимая связь между переменными (p < 0.05)")
+    else:
+        print("Нет статистически значимой связи между переменными (p >= 0.05)")
+
+
+def analyze_categorical_file(path, col1, col2, chunksize=None, renderer=None):
+    """Анализ двух категориальных столбцов файла без загрузки его в память"""
+    print(f"\nАнализ связи между {col1} и {col2} (файл {path})")
+    report_contingency(col1, col2, categorical_file_test(path, col1, col2, chunksize),
+                       renderer or ScreenRenderer())
+
+
+PAIR_TESTS = {
+    'numeric': numeric_numeric_test,
+    'numeric_categorical': numeric_categorical_test,
+    'categorical': categorical_categorical_test,
+}
+
+
+def approximate_pair_test(kind, df, col1, col2, sample_size=SAMPLE_SIZE, grouped=None, seed=0):
+    """Тест по случайной выборке для быстрого первичного отбора
+
+    Числовые пары берутся простой выборкой и получают доверительные интервалы
+    корреляций, числовые и категориальные - стратифицированной по группам.
+    Если p-value по выборке близко к 0.05, тест пересчитывается точно.
+    Хи-квадрат и так считается за один проход, поэтому всегда точный.
+    """
+    if kind == 'categorical' or len(df) <= sample_size:
+        return PAIR_TESTS[kind](df, col1, col2, grouped=grouped)
+
+    if kind == 'numeric':
+        rows = sample_rows(len(df), sample_size, seed)
+    else:
+        rows = stratified_sample_rows(df[col2], sample_size, seed)
+    result = PAIR_TESTS[kind](df.iloc[rows], col1, col2)
+
+    if any(near_threshold(result[key]) for key in ('p', 'spearman_p') if key in result):
+        return dict(PAIR_TESTS[kind](df, col1, col2, grouped=grouped), escalated=True)
+
+    result.update(approximate=True, sample_size=len(rows))
+    if kind == 'numeric':
+        result['pearson_ci'] = fisher_interval(result['pearson'], len(rows))
+        result['spearman_ci'] = fisher_interval(result['spearman'], len(rows), spearman=True)
+    return result
+
+
+def _run_pair_test(task):
+    """Выполнение теста в рабочем процессе"""
+    kind, df, col1, col2, sample_size = task
+    if sample_size:
+        return approximate_pair_test(kind, df, col1, col2, sample_size)
+    return PAIR_TESTS[kind](df, col1, col2)
+
+
+class RelationshipCache:
+    """Кэш результатов тестов: ключ - (вид теста, пара столбцов, отпечаток данных)
+
+    Если задан path, кэш читается из файла и сохраняется в него методом save().
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.results = {}
+        if path and os.path.exists(path):
+            with open(path, 'rb') as f:
+                self.results = pickle.load(f)
+
+    def get(self, key):
+        return self.results.get(key)
+
+    def put(self, key, result):
+        self.results[key] = result
+
+    def save(self):
+        if self.path:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(self.path, 'wb') as f:
+                pickle.dump(self.results, f)
+
 
 class DataRelationshipAnalyzer:
-    def __init__(self, df):
+    def __init__(self, df, renderer=None, cache=None, approximate=False, sample_size=SAMPLE_SIZE,
+                 profile=None, aggregate=None, summaries=None, fingerprints=None):
         self.df = df
+        # Графики по агрегатам (интервалы, квантили) вместо отдельных строк - для больших данных
+        self.aggregate = AggregatedPlots.should_aggregate(df, aggregate)
+        # Гистограммы, KDE и квантили по группам считаются один раз для всех графиков
+        self.summaries = summaries or SummaryCache(df)
+        # Шкалы и число различных значений столбцов: профиль строится один раз и сохраняется
+        self.profile = profile or ScaleProfile.for_frame(df)
+        # Приближённый режим: тесты по выборке, точный расчёт только вблизи порога
+        self.sample_size = sample_size if approximate else None
+        # Куда выводятся графики: окно (по умолчанию) или файлы
+        self.renderer = renderer or ScreenRenderer()
+        # Результаты тестов переиспользуются, пока данные столбцов не меняются
+        self.cache = cache if cache is not None else RelationshipCache()
+        # Отпечатки столбцов (могут прийти уже посчитанными от родительского анализатора)
+        self._fingerprints = dict(fingerprints or {})
+        # Разбиения на группы общие для всех числовых столбцов
+        self.grouped = GroupedData(df)
         self.numeric_cols = df.select_dtypes(include=['int64', 'float64']).columns
         self.categorical_cols = df.select_dtypes(include=['object', 'category']).columns
 
         # Определение шкал измерений для каждого признака
-        self.scale_types = {
-            'mpg': 'ratio',
-            'cylinders': 'ordinal',
-            'displacement': 'ratio',
-            'horsepower': 'ratio',
-            'weight': 'ratio',
-            'acceleration': 'ratio',
-            'model year': 'interval',
-            'origin': 'nominal',
-            'car name': 'nominal'
-        }
+        self.scale_types = self.profile.scale_types
+        # Числовые столбцы количественных и порядковых шкал: для них имеют смысл корреляции
+        self.quantitative_cols = [col for col in self.numeric_cols
+                                  if self.scale_types.get(col) in ('ratio', 'interval', 'ordinal')]
 
-    def analyze_relationship(self, col1, col2):
-        """Анализирует взаимосвязь между двумя переменными"""
+    def _pair_kind(self, col1, col2):
+        """Вид анализа для пары и порядок столбцов (числовой - первым)"""
         scale1 = self.scale_types.get(col1, 'unknown')
         scale2 = self.scale_types.get(col2, 'unknown')
 
-        print(f"\nАнализ взаимосвязи между '{col1}' ({scale1}) и '{col2}' ({scale2}):")
-
         # Случай 1: Обе переменные количественные или порядковые
         if (scale1 in ['ratio', 'interval', 'ordinal'] and
                 scale2 in ['ratio', 'interval', 'ordinal']):
-            self._analyze_numeric_numeric(col1, col2)
+            return 'numeric', col1, col2
 
         # Случай 2: Одна количественная/порядковая, другая категориальная
         elif (scale1 in ['ratio', 'interval', 'ordinal'] and scale2 == 'nominal'):
-            self._analyze_numeric_categorical(col1, col2)
+            return 'numeric_categorical', col1, col2
         elif (scale1 == 'nominal' and scale2 in ['ratio', 'interval', 'ordinal']):
-            self._analyze_numeric_categorical(col2, col1)
+            return 'numeric_categorical', col2, col1
 
         # Случай 3: Обе категориальные
         elif scale1 == 'nominal' and scale2 == 'nominal':
-            self._analyze_categorical_categorical(col1, col2)
+            return 'categorical', col1, col2
+
+        return None, col1, col2
+
+    def _fingerprint(self, col):
+        """Отпечаток данных столбца (считается один раз на анализатор)"""
+        if col not in self._fingerprints:
+            digest = hashlib.sha1(str(self.df[col].dtype).encode())
+            digest.update(row_hashes(self.df[[col]]).tobytes())
+            self._fingerprints[col] = digest.hexdigest()
+        return self._fingerprints[col]
+
+    def _cache_key(self, kind, col1, col2):
+        key = kind, col1, col2, self._fingerprint(col1), self._fingerprint(col2)
+        return key + ('approximate', self.sample_size) if self.sample_size else key
+
+    def _test(self, kind, col1, col2):
+        """Результат теста для пары из кэша или новый расчёт"""
+        key = self._cache_key(kind, col1, col2)
+        result = self.cache.get(key)
+        if result is None:
+            if self.sample_size:
+                result = approximate_pair_test(kind, self.df, col1, col2, self.sample_size,
+                                               grouped=self.grouped)
+            else:
+                result = PAIR_TESTS[kind](self.df, col1, col2, grouped=self.grouped)
+            self.cache.put(key, result)
+        return result
+
+    def analyze_relationship(self, col1, col2):
+        """Анализирует взаимосвязь между двумя переменными"""
+        scale1 = self.scale_types.get(col1, 'unknown')
+        scale2 = self.scale_types.get(col2, 'unknown')
 
+        print(f"\nАнализ взаимосвязи между '{col1}' ({scale1}) и '{col2}' ({scale2}):")
+
+        kind, first, second = self._pair_kind(col1, col2)
+        if kind == 'numeric':
+            self._analyze_numeric_numeric(first, second)
+        elif kind == 'numeric_categorical':
+            self._analyze_numeric_categorical(first, second)
+        elif kind == 'categorical':
+            self._analyze_categorical_categorical(first, second)
         else:
             print("Неизвестная комбинация типов переменных")
 
+    def analyze_pairs_parallel(self, pairs=None, workers=None):
+        """Тесты для многих пар в пуле процессов, без графиков, с кэшем результатов
+
+        По умолчанию берутся все пары комплексного анализа. Возвращает таблицу
+        с тестом, статистикой и p-value для каждой пары.
+        """
+        if pairs is None:
+            pairs = self._all_pairs()
+
+        rows, computed = self._pair_results(pairs, workers=workers)
+        print(f"Пар проанализировано: {len(rows)}, взято из кэша: {len(rows) - computed}")
+        return pd.DataFrame([
+            {'col1': col1, 'col2': col2, 'test': result['test'], 'stat': result['stat'],
+             'p': result['p'], 'significant': result['p'] < 0.05,
+             'approximate': result.get('approximate', False)}
+            for (col1, col2), result in ((pair, rows[pair]) for pair in pairs if pair in rows)
+        ])
+
+    def _all_pairs(self):
+        return [pair for _, section_pairs in self._comprehensive_sections() for pair in section_pairs]
+
+    def _pair_results(self, pairs, pool=None, workers=None):
+        """Результаты тестов для пар: из кэша, недостающие - в пуле процессов
+
+        pool - уже открытый пул (иначе создаётся свой). Новые результаты
+        сохраняются в кэш. Возвращает {пара: результат} и число посчитанных пар.
+        """
+        rows, pending = {}, []
+        for col1, col2 in pairs:
+            kind, first, second = self._pair_kind(col1, col2)
+            if kind is None:
+                continue
+            key = self._cache_key(kind, first, second)
+            result = self.cache.get(key)
+            if result is None:
+                pending.append((col1, col2, key,
+                                (kind, self.df[[first, second]], first, second, self.sample_size)))
+            else:
+                rows[(col1, col2)] = result
+
+        if pending:
+            with contextlib.nullcontext(pool) if pool else ProcessPoolExecutor(max_workers=workers) as pool:
+                results = pool.map(_run_pair_test, [task for *_, task in pending])
+                for (col1, col2, key, _), result in zip(pending, results):
+                    self.cache.put(key, result)
+                    rows[(col1, col2)] = result
+            self.cache.save()
+        return rows, len(pending)
+
     def _analyze_numeric_numeric(self, col1, col2):
         """Анализ связи между двумя числовыми/порядковыми переменными"""
         # Визуализация
         plt.figure(figsize=(10, 6))
-        sns.scatterplot(data=self.df, x=col1, y=col2)
+        if self.aggregate:
+            AggregatedPlots.density_grid(plt.gca(), self.df[col1], self.df[col2])
+            plt.xlabel(col1)
+            plt.ylabel(col2)
+        else:
+            sns.scatterplot(data=self.df, x=col1, y=col2)
         plt.title(f"Scatter plot: {col1} vs {col2}")
-        plt.show()
+        self.renderer.show()
 
         # Корреляционный анализ
-        pearson_corr, pearson_p = stats.pearsonr(self.df[col1], self.df[col2])
-        spearman_corr, spearman_p = stats.spearmanr(self.df[col1], self.df[col2])
+        result = self._test('numeric', col1, col2)
+        pearson_corr, pearson_p = result['pearson'], result['pearson_p']
+        spearman_corr, spearman_p = result['spearman'], result['spearman_p']
 
         print("\nКорреляционный анализ:")
+        self._print_mode(result)
         print(f"Корреляция Пирсона: {pearson_corr:.3f} (p-value: {pearson_p:.3f})")
         print(f"Корреляция Спирмена: {spearman_corr:.3f} (p-value: {spearman_p:.3f})")
+        if result.get('approximate'):
+            print("95% доверительный интервал Пирсона: [{:.3f}, {:.3f}]".format(*result['pearson_ci']))
+            print("95% доверительный интервал Спирмена: [{:.3f}, {:.3f}]".format(*result['spearman_ci']))
 
         # Интерпретация
         self._interpret_correlation(pearson_corr, spearman_corr)
@@ -72,31 +366,27 @@ class DataRelationshipAnalyzer:
         """Анализ связи между числовой и категориальной переменной"""
         # Визуализация
         plt.figure(figsize=(10, 6))
-        if len(self.df[cat_col].unique()) <= 5:
+        few_groups = len(self.grouped.groups(cat_col)) <= 5
+        if self.aggregate:
+            # Ящики и скрипки по квантилям и KDE из сводок групп
+            draw = AggregatedPlots.boxes if few_groups else AggregatedPlots.violins
+            draw(plt.gca(), self.summaries.grouped(num_col, cat_col))
+            plt.xlabel(cat_col)
+            plt.ylabel(num_col)
+        elif few_groups:
             sns.boxplot(data=self.df, x=cat_col, y=num_col)
         else:
             sns.violinplot(data=self.df, x=cat_col, y=num_col)
         plt.title(f"Распределение {num_col} по категориям {cat_col}")
         plt.xticks(rotation=45)
-        plt.show()
+        self.renderer.show()
 
         # Статистический анализ
-        groups = [group[1][num_col].values for group in self.df.groupby(cat_col)]
-
-        if len(groups) == 2:
-            # t-тест для двух групп
-            stat, p = stats.ttest_ind(*groups, equal_var=False)
-            test_name = "t-тест (Уэлча)"
-        else:
-            # ANOVA или Краскела-Уоллиса для нескольких групп
-            if stats.normaltest(self.df[num_col]).pvalue > 0.05:
-                stat, p = f_oneway(*groups)
-                test_name = "ANOVA"
-            else:
-                stat, p = kruskal(*groups)
-                test_name = "Краскела-Уоллиса"
+        result = self._test('numeric_categorical', num_col, cat_col)
+        test_name, stat, p = result['test'], result['stat'], result['p']
 
         print(f"\nРезультаты теста {test_name}:")
+        self._print_mode(result)
         print(f"Статистика: {stat:.3f}, p-value: {p:.3f}")
 
         # Интерпретация
@@ -105,31 +395,19 @@ class DataRelationshipAnalyzer:
         else:
             print("Нет статистически значимых различий между группами (p >= 0.05)")
 
+    @staticmethod
+    def _print_mode(result):
+        """Пометка о расчёте по выборке или о пересчёте на полных данных"""
+        if result.get('approximate'):
+            print(f"(приближённо, по выборке из {result['sample_size']} строк)")
+        elif result.get('escalated'):
+            print("(p-value по выборке близко к порогу, пересчитано на полных данных)")
+
     def _analyze_categorical_categorical(self, col1, col2):
         """Анализ связи между двумя категориальными переменными"""
         # Визуализация - таблица сопряженности
-        contingency_table = pd.crosstab(self.df[col1], self.df[col2])
-
-        print("\nТаблица сопряженности:")
-        print(contingency_table)
-
-        # Визуализация - тепловая карта
-        plt.figure(figsize=(10, 6))
-        sns.heatmap(contingency_table, annot=True, fmt='d', cmap='Blues')
-        plt.title(f"Связь между {col1} и {col2}")
-        plt.show()
-
-        # Хи-квадрат тест
-        chi2, p, dof, expected = chi2_contingency(contingency_table)
-
-        print("\nРезультаты теста хи-квадрат:")
-        print(f"Хи-квадрат: {chi2:.3f}, p-value: {p:.3f}, степени свободы: {dof}")
-
-        # Интерпретация
-        if p < 0.05:
-            print("Есть статистически значимая связь между переменными (p < 0.05)")
-        else:
-            print("Нет статистически значимой связи между переменными (p >= 0.05)")
+        result = self._test('categorical', col1, col2)
+        report_contingency(col1, col2, result, self.renderer)
 
     def _interpret_correlation(self, pearson, spearman):
         """Интерпретация корреляции"""
@@ -137,69 +415,177 @@ class DataRelationshipAnalyzer:
 
         corr = pearson  # Используем Пирсона для интерпретации
 
-        abs_corr = abs(corr)
-        if abs_corr >= 0.9:
-            strength = "очень сильная"
-        elif abs_corr >= 0.7:
-            strength = "сильная"
-        elif abs_corr >= 0.5:
-            strength = "умеренная"
-        elif abs_corr >= 0.3:
-            strength = "слабая"
-        else:
-            strength = "очень слабая или отсутствует"
-
-        direction = "положительная" if corr > 0 else "отрицательная"
-
-        print(f"{strength} {direction} корреляция")
-
-    def comprehensive_analysis(self):
-        """Комплексный анализ всех возможных пар переменных"""
-        print("\n" + "=" * 50)
-        print("КОМПЛЕКСНЫЙ АНАЛИЗ ВЗАИМОСВЯЗЕЙ")
-        print("=" * 50 + "\n")
-
-        # Анализ числовых переменных между собой
-        print("\n" + "-" * 20)
-        print("КОРРЕЛЯЦИОННЫЙ АНАЛИЗ ЧИСЛОВЫХ ПЕРЕМЕННЫХ")
-        print("-" * 20 + "\n")
-
+        print(f"{correlation_strength(corr)} корреляция")
+
+    def correlation_matrix(self, cols=None, plot=False):
+        """Корреляции Пирсона и Спирмена для всех пар количественных и порядковых столбцов сразу
+
+        Каждый столбец ранжируется один раз, все коэффициенты считаются одним
+        матричным произведением, p-value - через t-распределение с n-2 степенями
+        свободы (как в pearsonr и spearmanr). Строки с пропусками исключаются.
+        Возвращает таблицу: одна строка на пару столбцов.
+        """
+        cols = list(self.quantitative_cols if cols is None else cols)
+        data = self.df[cols].dropna().to_numpy(dtype=np.float64)
+        n = len(data)
+
+        pearson = _correlation_matrix(data)
+        spearman = _correlation_matrix(stats.rankdata(data, axis=0))
+
+        i, j = np.triu_indices(len(cols), k=1)
+        table = pd.DataFrame({
+            'col1': np.asarray(cols)[i],
+            'col2': np.asarray(cols)[j],
+            'pearson': pearson[i, j],
+            'pearson_p': _correlation_pvalues(pearson[i, j], n),
+            'spearman': spearman[i, j],
+            'spearman_p': _correlation_pvalues(spearman[i, j], n),
+        })
+        table['strength'] = [correlation_strength(corr) for corr in table['pearson']]
+
+        if plot:
+            fig, axes = plt.subplots(1, 2, figsize=(20, 8))
+            for ax, matrix, name in zip(axes, (pearson, spearman), ('Пирсона', 'Спирмена')):
+                sns.heatmap(pd.DataFrame(matrix, index=cols, columns=cols), annot=len(cols) <= 15,
+                            fmt='.2f', cmap='coolwarm', center=0, ax=ax)
+                ax.set_title(f'Корреляция {name}')
+            self.renderer.show()
+        return table
+
+    def _comprehensive_sections(self):
+        """Разделы комплексного анализа и пары переменных в каждом из них"""
         numeric_pairs = [(col1, col2) for i, col1 in enumerate(self.numeric_cols)
                          for j, col2 in enumerate(self.numeric_cols) if i < j]
 
-        for col1, col2 in numeric_pairs:
-            self.analyze_relationship(col1, col2)
+        numeric_categorical_pairs = [(num_col, cat_col) for num_col in self.numeric_cols
+                                     for cat_col in self.categorical_cols
+                                     if self.profile.distinct(cat_col) <= 10]  # Ограничим число категорий
 
-        # Анализ числовых и категориальных переменных
-        print("\n" + "-" * 20)
-        print("АНАЛИЗ ЧИСЛОВЫХ И КАТЕГОРИАЛЬНЫХ ПЕРЕМЕННЫХ")
-        print("-" * 20 + "\n")
+        # Хи-квадрат считается по разреженной таблице, поэтому ограничения на число категорий нет
+        categorical_pairs = [(col1, col2) for i, col1 in enumerate(self.categorical_cols)
+                             for j, col2 in enumerate(self.categorical_cols) if i < j]
 
-        for num_col in self.numeric_cols:
-            for cat_col in self.categorical_cols:
-                if len(self.df[cat_col].unique()) <= 10:  # Ограничим число категорий
-                    self.analyze_relationship(num_col, cat_col)
+        return [
+            ("КОРРЕЛЯЦИОННЫЙ АНАЛИЗ ЧИСЛОВЫХ ПЕРЕМЕННЫХ", numeric_pairs),
+            ("АНАЛИЗ ЧИСЛОВЫХ И КАТЕГОРИАЛЬНЫХ ПЕРЕМЕННЫХ", numeric_categorical_pairs),
+            ("АНАЛИЗ КАТЕГОРИАЛЬНЫХ ПЕРЕМЕННЫХ", categorical_pairs),
+        ]
 
-        # Анализ категориальных переменных между собой
+    @staticmethod
+    def _print_section(title):
         print("\n" + "-" * 20)
-        print("АНАЛИЗ КАТЕГОРИАЛЬНЫХ ПЕРЕМЕННЫХ")
+        print(title)
         print("-" * 20 + "\n")
 
-        categorical_pairs = [(col1, col2) for i, col1 in enumerate(self.categorical_cols)
-                             for j, col2 in enumerate(self.categorical_cols) if i < j]
+    def comprehensive_analysis(self, matrix_mode=False):
+        """Комплексный анализ всех возможных пар переменных
+
+        При matrix_mode пары количественных и порядковых столбцов анализируются одной
+        матричной операцией (correlation_matrix) без построения диаграмм рассеяния;
+        пары с номинальным числовым столбцом (например, origin) идут через analyze_relationship.
+        """
+        print("\n" + "=" * 50)
+        print("КОМПЛЕКСНЫЙ АНАЛИЗ ВЗАИМОСВЯЗЕЙ")
+        print("=" * 50 + "\n")
 
-        for col1, col2 in categorical_pairs:
-            if len(self.df[col1].unique()) <= 10 and len(self.df[col2].unique()) <= 10:
+        for section, (title, pairs) in enumerate(self._comprehensive_sections()):
+            self._print_section(title)
+            if matrix_mode and section == 0:
+                print(self.correlation_matrix().to_string(index=False, float_format='{:.3f}'.format))
+                pairs = [(col1, col2) for col1, col2 in pairs
+                         if col1 not in self.quantitative_cols or col2 not in self.quantitative_cols]
+            for col1, col2 in pairs:
                 self.analyze_relationship(col1, col2)
 
         print("\nАнализ завершен!")
 
-# Пример использования:
-df = pd.read_csv('auto-mpg-cleaned.csv')
-analyzer = DataRelationshipAnalyzer(df)
+    def _batch_job(self, col1, col2, result):
+        """Задание render_batch для пары: только её столбцы, настройки анализатора и готовый результат"""
+        cols = [col1, col2]
+        cache = RelationshipCache()
+        kind, first, second = self._pair_kind(col1, col2)
+        if result is not None:
+            cache.put(self._cache_key(kind, first, second), result)
+        options = {'cache': cache, 'approximate': self.sample_size is not None,
+                   'sample_size': self.sample_size or SAMPLE_SIZE, 'profile': self.profile,
+                   'aggregate': self.aggregate, 'summaries': self.summaries.subset(cols),
+                   'fingerprints': {col: self._fingerprint(col) for col in cols}}
+        return (f'{col1}__{col2}', call_method,
+                (DataRelationshipAnalyzer, self.df[cols], 'analyze_relationship', col1, col2),
+                {'options': options})
+
+    def comprehensive_analysis_batch(self, out_dir='plots', workers=None):
+        """Комплексный анализ без окон: пары обрабатываются параллельно, графики - в файлы"""
+        print("\n" + "=" * 50)
+        print("КОМПЛЕКСНЫЙ АНАЛИЗ ВЗАИМОСВЯЗЕЙ")
+        print("=" * 50 + "\n")
 
-# Для анализа конкретной пары переменных:
-analyzer.analyze_relationship('mpg', 'origin')
+        manifest = []
+        # Один пул на все разделы: процессы запускаются один раз
+        with render_pool(workers) as pool:
+            # Тесты считаются заранее и попадают в кэш, задания только рисуют и печатают
+            rows, _ = self._pair_results(self._all_pairs(), pool=pool)
+            for section, (title, pairs) in enumerate(self._comprehensive_sections(), start=1):
+                self._print_section(title)
+                jobs = [self._batch_job(col1, col2, rows.get((col1, col2))) for col1, col2 in pairs]
+                manifest.extend(render_batch(jobs, os.path.join(out_dir, f'section_{section}'),
+                                             pool=pool))
 
-#Для комплексного анализа всех переменных:
-analyzer.comprehensive_analysis()
\ No newline at end of file
+        print("\nАнализ завершен!")
+        return manifest
+
+
+def _correlation_matrix(data):
+    """Матрица корреляций Пирсона столбцов массива"""
+    centered = data - data.mean(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        centered /= np.linalg.norm(centered, axis=0)
+    return np.clip(centered.T @ centered, -1.0, 1.0)
+
+
+def _correlation_pvalues(r, n):
+    """Двусторонние p-value коэффициентов корреляции по t-распределению"""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        t = r * np.sqrt((n - 2) / (1.0 - r ** 2))
+    return 2 * stats.t.sf(np.abs(t), n - 2)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Анализ взаимосвязей в датасете auto-mpg')
+    parser.add_argument('--batch', metavar='DIR',
+                        help='сохранить все графики в каталог без показа окон')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--matrix', action='store_true',
+                        help='считать корреляции числовых пар одной матричной операцией')
+    parser.add_argument('--tests', action='store_true',
+                        help='только тесты для всех пар в пуле процессов, без графиков')
+    parser.add_argument('--cache', default=CACHE_PATH, help='файл кэша результатов тестов')
+    parser.add_argument('--chi2-file', nargs=3, metavar=('PATH', 'COL1', 'COL2'),
+                        help='хи-квадрат для двух категориальных столбцов файла, читаемого блоками')
+    parser.add_argument('--approx', action='store_true',
+                        help='приближённые тесты по выборке для быстрого первичного отбора')
+    parser.add_argument('--sample-size', type=int, default=SAMPLE_SIZE)
+    args = parser.parse_args()
+
+    if args.chi2_file:
+        path, col1, col2 = args.chi2_file
+        analyze_categorical_file(path, col1, col2)
+        sys.exit()
+
+    # Пример использования:
+    df = load_data()
+    analyzer = DataRelationshipAnalyzer(df, cache=RelationshipCache(args.cache),
+                                        approximate=args.approx, sample_size=args.sample_size)
+
+    if args.tests:
+        print(analyzer.analyze_pairs_parallel(workers=args.workers).to_string(index=False))
+    elif args.batch:
+        manifest = analyzer.comprehensive_analysis_batch(out_dir=args.batch, workers=args.workers)
+        print(f"Сохранено графиков: {sum(entry['path'] is not None for entry in manifest)}")
+    else:
+        # Для анализа конкретной пары переменных:
+        analyzer.analyze_relationship('mpg', 'origin')
+
+        #Для комплексного анализа всех переменных:
+        analyzer.comprehensive_analysis(matrix_mode=args.matrix)
+        analyzer.cache.save()
@@ -1,17 +1,22 @@
-import pandas as pd
-
-# Загрузка данных
-df = pd.read_csv('auto-mpg.csv')
-
-# 1. Преобразование столбца 'horsepower' в числовой формат
-df['horsepower'] = pd.to_numeric(df['horsepower'].replace('?', pd.NA), errors='coerce')
+import os
+import sys
 
-# 2. Обработка пропусков
-median_horsepower = df['horsepower'].median()
-df['horsepower'].fillna(median_horsepower, inplace=True)
+import pandas as pd
 
-# 3. Обработка дубликатов
-df.drop_duplicates(inplace=True)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'common'))
+from Pipeline import Pipeline
+from ScaleProfiler import SCALE_NAMES, ScaleProfile
+
+# Очистка описывается конвейером и выполняется при вызове collect()
+cleaning = (Pipeline.from_csv('auto-mpg.csv')
+            # 1. Преобразование столбца 'horsepower' в числовой формат
+            .assign(horsepower=lambda df: pd.to_numeric(df['horsepower'].replace('?', pd.NA), errors='coerce'))
+            # 2. Обработка пропусков
+            .fill_median(['horsepower'])
+            # 3. Обработка дубликатов
+            .drop_duplicates())
+df = cleaning.collect()
+print(f"Удалено дубликатов: {cleaning.op('drop_duplicates').removed} из {cleaning.rows_read} строк")
 
 # Вывод информации о типах данных
 print("\nТипы данных в датасете:")
@@ -19,20 +24,9 @@ print(df.dtypes)
 
 # Определение типов шкал измерений
 print("\nТипы шкал измерений для каждого признака:")
-scale_types = {
-    'mpg': 'Относительная (ratio)',
-    'cylinders': 'Порядковая (ordinal)',
-    'displacement': 'Относительная (ratio)',
-    'horsepower': 'Относительная (ratio)',
-    'weight': 'Относительная (ratio)',
-    'acceleration': 'Относительная (ratio)',
-    'model year': 'Интервальная (interval)',
-    'origin': 'Номинальная (nominal)',
-    'car name': 'Номинальная (nominal)'
-}
-
+profile = ScaleProfile.for_frame(df)
 for column in df.columns:
-    print(f"{column}: {scale_types.get(column, 'Не определено')}")
+    print(f"{column}: {SCALE_NAMES.get(profile.scale(column), 'Не определено')}")
 
 # Дополнительная информация о данных
 print("\nДополнительная информация:")
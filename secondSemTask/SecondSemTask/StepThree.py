@@ -1,37 +1,47 @@
+import argparse
+import os
+import sys
+
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'common'))
+from BatchRender import ScreenRenderer, call_method, render_batch
+from DataLoader import load_data
+from ScaleProfiler import ScaleProfile
+from SummaryCache import SummaryCache
+import AggregatedPlots
+
+
 class DataVisualizer:
-    def __init__(self, df):
+    def __init__(self, df, renderer=None, profile=None, aggregate=None, summaries=None):
         self.df = df
+        # Графики по агрегатам (интервалы, квантили) вместо отдельных строк - для больших данных
+        self.aggregate = AggregatedPlots.should_aggregate(df, aggregate)
+        # Гистограммы, KDE и квантили столбцов считаются один раз для всех графиков
+        self.summaries = summaries or SummaryCache(df)
+        # Шкалы и число различных значений столбцов: профиль строится один раз и сохраняется
+        self.profile = profile or ScaleProfile.for_frame(df)
+        # Куда выводятся графики: окно (по умолчанию) или файлы
+        self.renderer = renderer or ScreenRenderer()
         self.numeric_cols = df.select_dtypes(include=['int64', 'float64']).columns
         self.categorical_cols = df.select_dtypes(include=['object', 'category']).columns
-        self.scale_types = {
-            'mpg': 'ratio',
-            'cylinders': 'ordinal',
-            'displacement': 'ratio',
-            'horsepower': 'ratio',
-            'weight': 'ratio',
-            'acceleration': 'ratio',
-            'model year': 'interval',
-            'origin': 'nominal',
-            'car name': 'nominal'
-        }
+        self.scale_types = self.profile.scale_types
 
     def _determine_plot_type(self, col):
         """Определяет тип графика на основе шкалы измерения"""
         scale_type = self.scale_types.get(col, 'unknown')
 
         if scale_type == 'nominal':
-            if len(self.df[col].unique()) <= 10:
+            if self.profile.distinct(col) <= 10:
                 return 'countplot'
             else:
                 return 'barplot_top20'
         elif scale_type == 'ordinal':
             return 'histplot'
         elif scale_type in ['interval', 'ratio']:
-            if len(self.df[col].unique()) <= 10:
+            if self.profile.distinct(col) <= 10:
                 return 'boxplot'
             else:
                 return 'histplot'
@@ -46,25 +56,39 @@ class DataVisualizer:
         plt.title(f'Визуализация для "{col}" ({self.scale_types.get(col, "unknown")} scale)')
 
         if plot_type == 'countplot':
-            sns.countplot(data=self.df, x=col)
+            if self.aggregate:
+                AggregatedPlots.count_bars(plt.gca(), self.df[col])
+            else:
+                sns.countplot(data=self.df, x=col)
             plt.xticks(rotation=45)
         elif plot_type == 'barplot_top20':
             top20 = self.df[col].value_counts().nlargest(20)
             sns.barplot(x=top20.values, y=top20.index)
             plt.xlabel('Count')
         elif plot_type == 'histplot':
-            sns.histplot(data=self.df, x=col, kde=True)
+            if self.aggregate:
+                AggregatedPlots.hist_kde(plt.gca(), self.summaries.column(col))
+                plt.xlabel(col)
+            else:
+                sns.histplot(data=self.df, x=col, kde=True)
         elif plot_type == 'boxplot':
-            sns.boxplot(data=self.df, x=col)
+            if self.aggregate:
+                AggregatedPlots.boxes(plt.gca(), {col: self.summaries.column(col)})
+            else:
+                sns.boxplot(data=self.df, x=col)
 
         plt.tight_layout()
-        plt.show()
+        self.renderer.show()
 
     def visualize_numeric_relationships(self, target_col=None):
         """Визуализирует взаимосвязи между числовыми переменными"""
         if target_col:
             # Pairplot с выделением целевой переменной
-            sns.pairplot(self.df, vars=self.numeric_cols, hue=target_col)
+            if self.aggregate:
+                AggregatedPlots.pairplot(self.df, self.numeric_cols, hue=target_col,
+                                         summaries=self.summaries)
+            else:
+                sns.pairplot(self.df, vars=self.numeric_cols, hue=target_col)
             plt.suptitle(f'Pairplot с выделением по "{target_col}"', y=1.02)
         else:
             # Тепловая карта корреляций
@@ -74,7 +98,7 @@ class DataVisualizer:
             plt.title('Матрица корреляций числовых признаков')
 
         plt.tight_layout()
-        plt.show()
+        self.renderer.show()
 
     def visualize_categorical_relationships(self, target_col=None):
         """Визуализирует взаимосвязи категориальных переменных"""
@@ -85,18 +109,21 @@ class DataVisualizer:
         for col in self.categorical_cols:
             if col != target_col:
                 plt.figure(figsize=(10, 6))
-                if len(self.df[col].unique()) > 10:
+                if self.profile.distinct(col) > 10:
                     # Для переменных с большим числом категорий берем топ-10
                     top_categories = self.df[col].value_counts().nlargest(10).index
                     temp_df = self.df[self.df[col].isin(top_categories)]
                 else:
                     temp_df = self.df
 
-                sns.countplot(data=temp_df, x=col, hue=target_col)
+                if self.aggregate:
+                    pd.crosstab(temp_df[col], temp_df[target_col]).plot.bar(ax=plt.gca())
+                else:
+                    sns.countplot(data=temp_df, x=col, hue=target_col)
                 plt.title(f'Распределение "{col}" по "{target_col}"')
                 plt.xticks(rotation=45)
                 plt.tight_layout()
-                plt.show()
+                self.renderer.show()
 
     def comprehensive_visualization(self, target_col=None):
         """Комплексная визуализация всех переменных"""
@@ -113,17 +140,47 @@ class DataVisualizer:
         if target_col and target_col in self.categorical_cols:
             self.visualize_categorical_relationships(target_col)
 
-
-# Пример использования:
-# Загрузка данных
-df = pd.read_csv('auto-mpg-cleaned.csv')
-
-# Создание визуализатора
-visualizer = DataVisualizer(df)
-
-# Комплексная визуализация
-visualizer.comprehensive_visualization(target_col='origin')
-
-# Или выборочная визуализация:
-# visualizer.visualize_column('horsepower')
-# visualizer.visualize_numeric_relationships()
\ No newline at end of file
+    def _batch_job(self, name, cols, method, *args):
+        """Задание render_batch: только нужные столбцы и настройки этого визуализатора"""
+        cols = list(dict.fromkeys(cols))
+        options = {'profile': self.profile, 'aggregate': self.aggregate,
+                   'summaries': self.summaries.subset(cols)}
+        return (name, call_method, (DataVisualizer, self.df[cols], method, *args), {'options': options})
+
+    def comprehensive_visualization_batch(self, target_col=None, out_dir='plots', workers=None):
+        """Комплексная визуализация без окон: графики рисуются параллельно в файлы"""
+        jobs = [self._batch_job(f'column_{col}', [col], 'visualize_column', col)
+                for col in self.df.columns]
+        target = [target_col] if target_col else []
+        jobs.append(self._batch_job('numeric_relationships', [*self.numeric_cols, *target],
+                                    'visualize_numeric_relationships', target_col))
+        if target_col and target_col in self.categorical_cols:
+            jobs.append(self._batch_job('categorical_relationships', [*self.categorical_cols, target_col],
+                                        'visualize_categorical_relationships', target_col))
+        return render_batch(jobs, out_dir, workers)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Визуализация датасета auto-mpg')
+    parser.add_argument('--batch', metavar='DIR',
+                        help='сохранить все графики в каталог без показа окон')
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    # Пример использования:
+    # Загрузка данных
+    df = load_data()
+
+    # Создание визуализатора
+    visualizer = DataVisualizer(df)
+
+    # Комплексная визуализация
+    if args.batch:
+        manifest = visualizer.comprehensive_visualization_batch(target_col='origin', out_dir=args.batch,
+                                                                workers=args.workers)
+        print(f"Сохранено графиков: {sum(entry['path'] is not None for entry in manifest)}")
+    else:
+        visualizer.comprehensive_visualization(target_col='origin')
+
+    # Или выборочная визуализация:
+    # visualizer.visualize_column('horsepower')
+    # visualizer.visualize_numeric_relationships()
@@ -0,0 +1,242 @@
+import numpy as np
+import pandas as pd
+
+from GroupedData import CategoryGroups
+
+# Наибольшее число мелких интервалов гистограммы столбца; при выходе за него
+# соседние интервалы сливаются попарно, а ширина удваивается
+MAX_BINS = 4096
+# Доля квантилей в ящике с усами
+BOX_QUANTILES = (0.25, 0.5, 0.75)
+
+
+class ColumnSummary:
+    """Сводка числового столбца: мелкая гистограмма с общей сеткой и моменты
+
+    Интервалы имеют одну ширину и начало, поэтому любые более крупные
+    интервалы для графиков получаются сложением соседних, KDE считается
+    свёрткой частот через БПФ, а квантили - по накопленным частотам
+    (с точностью до ширины мелкого интервала). Новые строки добавляются
+    через update() без пересчёта по старым.
+    """
+
+    def __init__(self):
+        self.origin = None
+        self.width = None
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.n = 0
+        self.missing = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.nan
+        self.max = np.nan
+        self._kde = None
+
+    @classmethod
+    def of(cls, values):
+        summary = cls()
+        summary.update(values)
+        return summary
+
+    def update(self, values):
+        """Добавить значения (пропуски только считаются)"""
+        values = np.asarray(values, dtype=np.float64)
+        known = ~np.isnan(values)
+        self.missing += len(values) - int(known.sum())
+        values = values[known]
+        if not len(values):
+            return
+        low, high = values.min(), values.max()
+        if self.origin is None:
+            self.origin = low
+            self.width = (high - low) / (MAX_BINS // 2) if high > low else 1.0
+        self._extend(low, high)
+        index = np.minimum(((values - self.origin) / self.width).astype(np.int64), len(self.counts) - 1)
+        self.counts += np.bincount(index, minlength=len(self.counts))
+
+        # Объединение моментов (формула Чана для Уэлфорда)
+        n, mean = len(values), values.mean()
+        m2 = ((values - mean) ** 2).sum()
+        total = self.n + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta ** 2 * self.n * n / total
+        self.n = total
+        self.min = low if np.isnan(self.min) else min(self.min, low)
+        self.max = high if np.isnan(self.max) else max(self.max, high)
+        self._kde = None
+
+    def _extend(self, low, high):
+        """Расширить сетку до [low, high], сохраняя начало сетки
+
+        Сначала находится, во сколько раз (степень двойки) нужно укрупнить
+        интервалы, чтобы [low, high] поместился в MAX_BINS, затем накопленные
+        частоты сливаются группами по factor и только потом добавляются пустые
+        интервалы - сетка со старой шириной целиком не строится.
+        """
+        factor = 1
+        while True:
+            width = self.width * factor
+            size = -(-len(self.counts) // factor)
+            before = max(int(np.ceil((self.origin - low) / width)), 0)
+            after = max(int(np.floor((high - self.origin) / width)) + 1 - size, 0)
+            if before + size + after <= MAX_BINS:
+                break
+            factor *= 2
+        if factor > 1:
+            if len(self.counts):
+                self.counts = np.add.reduceat(self.counts, np.arange(0, len(self.counts), factor))
+            self.width = width
+        if before or after:
+            self.counts = np.concatenate([np.zeros(before, dtype=np.int64), self.counts,
+                                          np.zeros(after, dtype=np.int64)])
+            self.origin -= before * width
+
+    @property
+    def edges(self):
+        return self.origin + self.width * np.arange(len(self.counts) + 1)
+
+    @property
+    def var(self):
+        return self.m2 / (self.n - 1) if self.n > 1 else np.nan
+
+    @property
+    def std(self):
+        return np.sqrt(self.var)
+
+    def _factor(self, bins):
+        return max(1, int(np.ceil(len(self.counts) / bins))) if bins else 1
+
+    def histogram(self, bins=None):
+        """Частоты и границы не более чем bins интервалов (сложением соседних мелких)"""
+        factor = self._factor(bins)
+        counts = np.pad(self.counts, (0, -len(self.counts) % factor))
+        edges = self.origin + self.width * factor * np.arange(len(counts) // factor + 1)
+        return counts.reshape(-1, factor).sum(axis=1), edges
+
+    def _fine_kde(self):
+        """Плотность на мелкой сетке: свёртка частот с гауссовым ядром через БПФ
+
+        Ширина ядра по правилу Скотта, как в scipy.stats.gaussian_kde.
+        """
+        if self._kde is None:
+            counts = self.counts.astype(np.float64)
+            sigma = self.std * self.n ** (-1 / 5) / self.width if self.n > 1 else 0
+            if not sigma > 0:
+                self._kde = counts / max(self.n, 1) / self.width
+                return self._kde
+            half = int(np.ceil(4 * sigma))
+            kernel = np.exp(-0.5 * (np.arange(-half, half + 1) / sigma) ** 2)
+            size = 1 << int(np.ceil(np.log2(len(counts) + len(kernel) - 1)))
+            full = np.fft.irfft(np.fft.rfft(counts, size) * np.fft.rfft(kernel / kernel.sum(), size), size)
+            self._kde = np.maximum(full[half:half + len(counts)], 0) / self.n / self.width
+        return self._kde
+
+    def kde(self, bins=None):
+        """Центры интервалов и плотность (интеграл равен 1) на сетке не более чем из bins точек"""
+        factor = self._factor(bins)
+        density = self._fine_kde()
+        size = len(density)
+        # Последний крупный интервал может быть неполным: среднее только по мелким в нём
+        density = np.pad(density, (0, -size % factor)).reshape(-1, factor).sum(axis=1)
+        density /= np.minimum(factor, size - factor * np.arange(len(density)))
+        edges = self.origin + self.width * factor * np.arange(len(density) + 1)
+        return (edges[:-1] + edges[1:]) / 2, density
+
+    def _order_statistic(self, k):
+        """k-е по возрастанию значение (с нуля): значения внутри интервала считаются равномерными"""
+        cumulative = np.cumsum(self.counts)
+        index = np.searchsorted(cumulative, k, side='right')
+        inside = (k - (cumulative[index] - self.counts[index]) + 0.5) / self.counts[index]
+        return np.clip(self.origin + self.width * (index + inside), self.min, self.max)
+
+    def quantile(self, q):
+        """Квантили с линейной интерполяцией между порядковыми статистиками (как np.quantile)"""
+        position = np.asarray(q, dtype=np.float64) * (self.n - 1)
+        low = np.floor(position).astype(np.int64)
+        high = np.minimum(low + 1, self.n - 1)
+        fraction = position - low
+        return self._order_statistic(low) * (1 - fraction) + self._order_statistic(high) * fraction
+
+    def box(self):
+        """Квартили и усы по правилу 1.5 IQR (граница уса - край ближайшего непустого интервала)"""
+        q1, median, q3 = self.quantile(BOX_QUANTILES)
+        iqr = q3 - q1
+        edges = self.edges
+        occupied = np.flatnonzero(self.counts)
+        inside = occupied[(edges[occupied + 1] >= q1 - 1.5 * iqr) & (edges[occupied] <= q3 + 1.5 * iqr)]
+        return {'q1': q1, 'med': median, 'q3': q3, 'mean': self.mean,
+                'whislo': max(edges[inside[0]], self.min), 'whishi': min(edges[inside[-1] + 1], self.max)}
+
+
+class SummaryCache:
+    """Сводки столбцов и групп, общие для всех графиков одного датафрейма
+
+    Сводка строится при первом запросе и дальше переиспользуется; append()
+    дополняет уже построенные сводки только новыми строками и не копирует
+    накопленные данные.
+    """
+
+    def __init__(self, df):
+        # Добавленные порции строк; склеиваются только когда нужна новая сводка
+        self._chunks = [df]
+        self.columns = {}
+        self.groups = {}
+
+    @property
+    def df(self):
+        if len(self._chunks) > 1:
+            self._chunks = [pd.concat(self._chunks, ignore_index=True)]
+        return self._chunks[0]
+
+    def column(self, col):
+        if col not in self.columns:
+            self.columns[col] = ColumnSummary.of(self.df[col])
+        return self.columns[col]
+
+    def grouped(self, num_col, cat_col):
+        """Сводки числового столбца по категориям: {категория: ColumnSummary}, по порядку категорий"""
+        key = (num_col, cat_col)
+        if key not in self.groups:
+            self.groups[key] = {}
+            self._update_groups(key, self.df)
+        return self.groups[key]
+
+    def subset(self, cols):
+        """Кэш только для части столбцов с уже построенными для них сводками
+
+        Нужен заданиям в других процессах: им передаются лишь их столбцы.
+        """
+        cols = list(cols)
+        part = SummaryCache(self.df[cols])
+        part.columns = {col: summary for col, summary in self.columns.items() if col in cols}
+        part.groups = {key: groups for key, groups in self.groups.items() if set(key) <= set(cols)}
+        return part
+
+    def _update_groups(self, key, rows):
+        num_col, cat_col = key
+        groups = CategoryGroups(rows[cat_col])
+        summaries = self.groups[key]
+        for label, values in zip(groups.labels, groups.values(rows[num_col]).slices):
+            summaries.setdefault(label, ColumnSummary()).update(values)
+        self.groups[key] = dict(sorted(summaries.items()))
+
+    def append(self, rows):
+        """Добавить строки: построенные сводки обновляются по новым строкам"""
+        self._chunks.append(rows)
+        for col, summary in self.columns.items():
+            summary.update(rows[col])
+        for key in self.groups:
+            self._update_groups(key, rows)
+
+
+if __name__ == '__main__':
+    from DataLoader import load_data
+
+    df = load_data()
+    cache = SummaryCache(df)
+    for col in df.select_dtypes(include='number').columns:
+        summary = cache.column(col)
+        q1, median, q3 = summary.quantile(BOX_QUANTILES)
+        print(f"{col}: n={summary.n}, среднее={summary.mean:.3f}, std={summary.std:.3f}, "
+              f"квартили=({q1:.3f}, {median:.3f}, {q3:.3f})")